@@ -0,0 +1,142 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USERNAME = 'benchuser'
+PASSWORD = 'benchpass123'
+
+
+async def _measure(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    requests: int,
+    concurrency: int,
+    **kwargs,
+) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def send() -> None:
+        async with semaphore:
+            response = await client.request(method, url, **kwargs)
+            response.raise_for_status()
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(send() for _ in range(requests)))
+    return requests / (time.perf_counter() - started_at)
+
+
+async def run_worker(
+    requests: int,
+    concurrency: int,
+    login_concurrency: int,
+) -> dict[str, float]:
+    from shenase.main import app
+    from shenase.database import Base, engine
+
+    Base.metadata.create_all(bind=engine)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url='http://bench'
+    ) as client:
+        await client.post(
+            '/users/',
+            data={
+                'username': USERNAME,
+                'email': f'{USERNAME}@example.com',
+                'password': PASSWORD,
+                'display_name': 'Bench User',
+            },
+        )
+        credentials = {'username': USERNAME, 'password': PASSWORD}
+        login_response = await client.post('/login/', json=credentials)
+        login_response.raise_for_status()
+        client.cookies.set(
+            'access_token', login_response.cookies['access_token']
+        )
+        return {
+            'users_me_rps': await _measure(
+                client, 'GET', '/users/me/', requests, concurrency
+            ),
+            'login_rps': await _measure(
+                client,
+                'POST',
+                '/login/',
+                max(requests // 20, login_concurrency),
+                login_concurrency,
+                json=credentials,
+            ),
+        }
+
+
+def run_mode(
+    async_enabled: bool,
+    requests: int,
+    concurrency: int,
+    login_concurrency: int,
+) -> dict[str, float]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = os.environ | {
+            'DATABASE_URL': f'sqlite:///{tmp_dir}/bench.sqlite3',
+            'DATABASE_ASYNC_ENABLED': '1' if async_enabled else '0',
+            'SESSION_CACHE_MAX_SIZE': '0',
+            'PYTHONPATH': ROOT_DIR,
+        }
+        output = subprocess.check_output(
+            [
+                sys.executable,
+                __file__,
+                '--worker',
+                f'--requests={requests}',
+                f'--concurrency={concurrency}',
+                f'--login-concurrency={login_concurrency}',
+            ],
+            env=env,
+        )
+    return json.loads(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Compare sync and async database throughput.'
+    )
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--login-concurrency', type=int, default=4)
+    parser.add_argument(
+        '--worker', action='store_true', help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.worker:
+        results = asyncio.run(
+            run_worker(args.requests, args.concurrency, args.login_concurrency)
+        )
+        print(json.dumps(results))
+        return
+
+    print(f'{"mode":<8}{"/users/me/ rps":>18}{"/login/ rps":>14}')
+    for async_enabled in (False, True):
+        results = run_mode(
+            async_enabled,
+            args.requests,
+            args.concurrency,
+            args.login_concurrency,
+        )
+        print(
+            f'{"async" if async_enabled else "sync":<8}'
+            f'{results["users_me_rps"]:>18.1f}'
+            f'{results["login_rps"]:>14.1f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,429 @@
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import shutil
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Iterator, Optional
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AVATAR_PATH = os.path.join(ROOT_DIR, 'shenase', 'tests', 'avatar.png')
+DEFAULT_AVATAR_PATH = os.path.join(
+    ROOT_DIR, 'shenase', 'media', 'avatars', 'default.png'
+)
+PASSWORD = 'loadtest-password'
+PAGE_SIZE = 50
+SCENARIOS = {
+    'login': {'login': 1},
+    'me': {'read_users_me': 1},
+    'profiles': {'read_profiles': 1, 'read_user_profile': 1},
+    'signup': {'signup': 1},
+    'mixed': {
+        'login': 1,
+        'read_users_me': 10,
+        'read_profiles': 4,
+        'read_user_profile': 4,
+        'signup': 1,
+    },
+}
+AUTHENTICATED_OPERATIONS = {'read_users_me'}
+signup_ids = itertools.count()
+
+
+@dataclass(slots=True)
+class VirtualUser:
+    client: httpx.AsyncClient
+    username: str
+    users: int
+    rng: random.Random
+    next_cursor: Optional[str] = None
+    etags: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass(slots=True)
+class OperationResult:
+    latencies: list[float] = field(default_factory=list)
+    errors: int = 0
+
+    def summarize(self, elapsed: float) -> dict[str, float]:
+        latencies = sorted(self.latencies)
+        if len(latencies) > 1:
+            cut_points = statistics.quantiles(
+                latencies, n=100, method='inclusive'
+            )
+            p50, p95, p99 = cut_points[49], cut_points[94], cut_points[98]
+        else:
+            p50 = p95 = p99 = latencies[0] if latencies else 0.0
+        return {
+            'requests': len(latencies),
+            'errors': self.errors,
+            'error_rate': self.errors / len(latencies) if latencies else 0.0,
+            'rps': len(latencies) / elapsed,
+            'p50_ms': p50 * 1000,
+            'p95_ms': p95 * 1000,
+            'p99_ms': p99 * 1000,
+        }
+
+
+async def login(user: VirtualUser) -> httpx.Response:
+    response = await user.client.post(
+        '/login/', json={'username': user.username, 'password': PASSWORD}
+    )
+    if 'access_token' in response.cookies:
+        user.client.cookies.set(
+            'access_token', response.cookies['access_token']
+        )
+    return response
+
+
+async def read_users_me(user: VirtualUser) -> httpx.Response:
+    return await user.client.get('/users/me/')
+
+
+async def read_profiles(user: VirtualUser) -> httpx.Response:
+    params = {'limit': PAGE_SIZE}
+    if user.next_cursor is not None:
+        params['cursor'] = user.next_cursor
+    response = await user.client.get('/profiles/', params=params)
+    if response.status_code == 200:
+        user.next_cursor = response.json()['next_cursor']
+    return response
+
+
+async def read_user_profile(user: VirtualUser) -> httpx.Response:
+    username = f'loaduser{user.rng.randrange(user.users)}'
+    headers = {}
+    if username in user.etags:
+        headers['If-None-Match'] = user.etags[username]
+    response = await user.client.get(
+        f'/users/{username}/profile/', headers=headers
+    )
+    if 'etag' in response.headers:
+        user.etags[username] = response.headers['etag']
+    return response
+
+
+async def signup(user: VirtualUser) -> httpx.Response:
+    username = f'signup{os.getpid()}x{next(signup_ids)}'
+    with open(AVATAR_PATH, 'rb') as avatar:
+        return await user.client.post(
+            '/users/',
+            data={
+                'username': username,
+                'email': f'{username}@example.com',
+                'password': PASSWORD,
+                'display_name': 'Load Test User',
+            },
+            files={'avatar': ('avatar.png', avatar, 'image/png')},
+        )
+
+
+OPERATIONS: dict[str, Callable[[VirtualUser], Awaitable[httpx.Response]]] = {
+    'login': login,
+    'read_users_me': read_users_me,
+    'read_profiles': read_profiles,
+    'read_user_profile': read_user_profile,
+    'signup': signup,
+}
+
+
+async def run_scenario(
+    base_url: str,
+    scenario: str,
+    users: int,
+    concurrency: int,
+    duration: float,
+    seed: int,
+) -> tuple[dict[str, OperationResult], float]:
+    operations, weights = zip(*SCENARIOS[scenario].items())
+    results = {name: OperationResult() for name in operations}
+    deadline = time.perf_counter() + duration
+
+    async def run_user(index: int) -> None:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+            user = VirtualUser(
+                client=client,
+                username=f'loaduser{index % users}',
+                users=users,
+                rng=random.Random(seed + index),
+            )
+            if AUTHENTICATED_OPERATIONS.intersection(operations):
+                (await login(user)).raise_for_status()
+            while time.perf_counter() < deadline:
+                name = user.rng.choices(operations, weights)[0]
+                started_at = time.perf_counter()
+                try:
+                    response = await OPERATIONS[name](user)
+                    failed = response.is_error
+                except httpx.HTTPError:
+                    failed = True
+                results[name].latencies.append(
+                    time.perf_counter() - started_at
+                )
+                results[name].errors += failed
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(run_user(i) for i in range(concurrency)))
+    return results, time.perf_counter() - started_at
+
+
+async def run_load(
+    base_url: str,
+    scenario: str,
+    users: int,
+    concurrency: int,
+    duration: float,
+    warmup: float,
+    seed: int,
+) -> dict[str, dict[str, float]]:
+    if warmup > 0:
+        await run_scenario(
+            base_url, scenario, users, concurrency, warmup, seed
+        )
+    results, elapsed = await run_scenario(
+        base_url, scenario, users, concurrency, duration, seed
+    )
+    total = OperationResult(
+        latencies=[
+            latency
+            for result in results.values()
+            for latency in result.latencies
+        ],
+        errors=sum(result.errors for result in results.values()),
+    )
+    return {
+        **{
+            name: result.summarize(elapsed) for name, result in results.items()
+        },
+        'total': total.summarize(elapsed),
+    }
+
+
+def seed_users(users: int) -> None:
+    from shenase import crud, utils
+    from shenase.database import SessionLocal, engine
+    from shenase.migrations import upgrade_schema
+
+    upgrade_schema(engine)
+    hashed_password = utils.get_password_hash(PASSWORD)
+    with SessionLocal() as db:
+        crud.import_users(
+            db,
+            [
+                {
+                    'username': f'loaduser{i}',
+                    'email': f'loaduser{i}@example.com',
+                    'hashed_password': hashed_password,
+                    'display_name': f'Load User {i}',
+                    'bio': 'Seeded for load testing.',
+                    'location': None,
+                }
+                for i in range(users)
+            ],
+        )
+
+
+def _get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_ready(
+    base_url: str,
+    process: subprocess.Popen,
+    timeout: float = 30,
+) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('The server exited during startup.')
+        try:
+            httpx.get(f'{base_url}/profiles/', params={'limit': 1})
+        except httpx.TransportError:
+            time.sleep(0.2)
+        else:
+            return
+    raise RuntimeError('The server did not start in time.')
+
+
+@contextmanager
+def run_server(
+    database_url: Optional[str],
+    users: int,
+    workers: int,
+) -> Iterator[str]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        port = _get_free_port()
+        avatar_storage_path = os.path.join(tmp_dir, 'avatars')
+        os.makedirs(avatar_storage_path)
+        shutil.copy(DEFAULT_AVATAR_PATH, avatar_storage_path)
+        env = os.environ | {
+            'DATABASE_URL': database_url
+            or f'sqlite:///{tmp_dir}/loadtest.sqlite3',
+            'AVATAR_STORAGE_PATH': avatar_storage_path,
+            'AVATAR_STORAGE_BACKEND': 'local',
+            'DEBUG_ENABLED': os.environ.get('DEBUG_ENABLED', '0'),
+            'LOGIN_USERNAME_BURST': '0',
+            'LOGIN_CLIENT_BURST': '0',
+            'PYTHONPATH': ROOT_DIR,
+        }
+        subprocess.run(
+            [sys.executable, __file__, '--seed-users', f'--users={users}'],
+            env=env,
+            check=True,
+        )
+        process = subprocess.Popen(
+            [
+                sys.executable,
+                '-m',
+                'uvicorn',
+                'shenase.main:app',
+                '--host=127.0.0.1',
+                f'--port={port}',
+                f'--workers={workers}',
+                '--log-level=warning',
+            ],
+            env=env,
+            cwd=ROOT_DIR,
+        )
+        base_url = f'http://127.0.0.1:{port}'
+        try:
+            _wait_until_ready(base_url, process)
+            yield base_url
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+
+def compare_with_baseline(
+    results: dict[str, dict[str, dict[str, float]]],
+    baseline: dict[str, dict[str, dict[str, float]]],
+    tolerance: float,
+) -> list[str]:
+    regressions = []
+    for scenario, operations in results.items():
+        for name, actual in operations.items():
+            expected = baseline.get(scenario, {}).get(name)
+            if expected is None:
+                continue
+            label = f'{scenario}/{name}'
+            for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+                if actual[key] > expected[key] * (1 + tolerance):
+                    regressions.append(
+                        f'{label} {key}: {actual[key]:.1f} > '
+                        f'{expected[key]:.1f}'
+                    )
+            if actual['rps'] < expected['rps'] * (1 - tolerance):
+                regressions.append(
+                    f'{label} rps: {actual["rps"]:.1f} < {expected["rps"]:.1f}'
+                )
+            if actual['error_rate'] > expected['error_rate'] + 0.01:
+                regressions.append(
+                    f'{label} error rate: {actual["error_rate"]:.1%} > '
+                    f'{expected["error_rate"]:.1%}'
+                )
+    return regressions
+
+
+def print_results(results: dict[str, dict[str, dict[str, float]]]) -> None:
+    print(
+        f'{"scenario":<10}{"operation":<20}{"requests":>10}{"errors":>8}'
+        f'{"rps":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}'
+    )
+    for scenario, operations in results.items():
+        for name, result in operations.items():
+            print(
+                f'{scenario:<10}{name:<20}{result["requests"]:>10}'
+                f'{result["errors"]:>8}{result["rps"]:>10.1f}'
+                f'{result["p50_ms"]:>10.1f}{result["p95_ms"]:>10.1f}'
+                f'{result["p99_ms"]:>10.1f}'
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Load test shenase through a real uvicorn server.'
+    )
+    parser.add_argument(
+        '--scenario',
+        action='append',
+        choices=list(SCENARIOS),
+        help='Scenario to run; repeat to run several (default: all).',
+    )
+    parser.add_argument(
+        '--database-url',
+        help='Database to test against (default: a temporary SQLite file).',
+    )
+    parser.add_argument('--users', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--warmup', type=float, default=2)
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='Write the results to a JSON file.')
+    parser.add_argument(
+        '--baseline', help='Fail when results regress beyond this file.'
+    )
+    parser.add_argument(
+        '--tolerance',
+        type=float,
+        default=0.2,
+        help='Allowed regression as a fraction of the baseline.',
+    )
+    parser.add_argument(
+        '--seed-users',
+        dest='seed_only',
+        action='store_true',
+        help=argparse.SUPPRESS,
+    )
+    args = parser.parse_args()
+
+    if args.seed_only:
+        seed_users(args.users)
+        return
+
+    results: dict[str, Any] = {}
+    with run_server(args.database_url, args.users, args.workers) as base_url:
+        for scenario in args.scenario or list(SCENARIOS):
+            results[scenario] = asyncio.run(
+                run_load(
+                    base_url,
+                    scenario,
+                    args.users,
+                    args.concurrency,
+                    args.duration,
+                    args.warmup,
+                    args.seed,
+                )
+            )
+    print_results(results)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_with_baseline(
+                results, json.load(f), args.tolerance
+            )
+        if regressions:
+            print('Regressions against the baseline:')
+            for regression in regressions:
+                print(f'  {regression}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
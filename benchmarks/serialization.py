@@ -0,0 +1,179 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USERNAME = 'benchadmin'
+PASSWORD = 'benchpass123'
+ENCODINGS = ('identity', 'gzip', 'br')
+
+
+def seed(users: int) -> None:
+    from shenase import crud, enums, schemas, utils
+    from shenase.database import Base, SessionLocal, engine
+
+    Base.metadata.create_all(bind=engine)
+    hashed_password = utils.get_password_hash(PASSWORD)
+    with SessionLocal() as db:
+        crud.create_user(
+            db=db,
+            user=schemas.UserCreate(
+                username=USERNAME,
+                email=f'{USERNAME}@example.com',
+                password=PASSWORD,
+                display_name='Bench Admin',
+            ),
+        )
+        crud.update_user_role(
+            db=db, username=USERNAME, new_role=enums.UserRole.ADMIN
+        )
+        crud.import_users(
+            db,
+            [
+                {
+                    'username': f'benchuser{i}',
+                    'email': f'benchuser{i}@example.com',
+                    'hashed_password': hashed_password,
+                    'display_name': f'Bench User {i}',
+                    'bio': 'A short biography for benchmarking. ' * 3,
+                    'location': 'Somewhere',
+                }
+                for i in range(users)
+            ],
+        )
+
+
+async def _measure(
+    client: httpx.AsyncClient,
+    url: str,
+    encoding: str,
+    requests: int,
+    concurrency: int,
+) -> dict[str, float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    payload_bytes = wire_bytes = 0
+
+    async def send() -> None:
+        nonlocal payload_bytes, wire_bytes
+        async with semaphore:
+            response = await client.get(
+                url, headers={'Accept-Encoding': encoding}
+            )
+            response.raise_for_status()
+            payload_bytes += len(response.content)
+            wire_bytes += response.num_bytes_downloaded
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(send() for _ in range(requests)))
+    elapsed = time.perf_counter() - started_at
+    return {
+        'rps': requests / elapsed,
+        'payload_mb_per_second': payload_bytes / elapsed / 1e6,
+        'wire_bytes': wire_bytes / requests,
+    }
+
+
+async def run_worker(
+    requests: int,
+    concurrency: int,
+    limit: int,
+) -> dict[str, dict[str, float]]:
+    from shenase.main import app
+
+    seed(limit)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url='http://bench'
+    ) as client:
+        login_response = await client.post(
+            '/login/', json={'username': USERNAME, 'password': PASSWORD}
+        )
+        login_response.raise_for_status()
+        client.cookies.set(
+            'access_token', login_response.cookies['access_token']
+        )
+        return {
+            f'{path} {encoding}': await _measure(
+                client,
+                f'{path}?limit={limit}',
+                encoding,
+                requests,
+                concurrency,
+            )
+            for path in ('/users/', '/profiles/')
+            for encoding in ENCODINGS
+        }
+
+
+def run_mode(
+    fast_json: bool,
+    requests: int,
+    concurrency: int,
+    limit: int,
+) -> dict[str, dict[str, float]]:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = os.environ | {
+            'DATABASE_URL': f'sqlite:///{tmp_dir}/bench.sqlite3',
+            'FAST_JSON_RESPONSES_ENABLED': '1' if fast_json else '0',
+            'PAGE_SIZE_MAX': str(limit),
+            'PYTHONPATH': ROOT_DIR,
+        }
+        output = subprocess.check_output(
+            [
+                sys.executable,
+                __file__,
+                '--worker',
+                f'--requests={requests}',
+                f'--concurrency={concurrency}',
+                f'--limit={limit}',
+            ],
+            env=env,
+        )
+    return json.loads(output)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Compare default and fast JSON list responses.'
+    )
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--limit', type=int, default=200)
+    parser.add_argument(
+        '--worker', action='store_true', help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    if args.worker:
+        results = asyncio.run(
+            run_worker(args.requests, args.concurrency, args.limit)
+        )
+        print(json.dumps(results))
+        return
+
+    print(
+        f'{"mode":<8}{"request":<22}{"rps":>10}'
+        f'{"payload MB/s":>15}{"bytes/response":>16}'
+    )
+    for fast_json in (False, True):
+        results = run_mode(
+            fast_json, args.requests, args.concurrency, args.limit
+        )
+        for name, result in results.items():
+            print(
+                f'{"fast" if fast_json else "default":<8}{name:<22}'
+                f'{result["rps"]:>10.1f}'
+                f'{result["payload_mb_per_second"]:>15.2f}'
+                f'{result["wire_bytes"]:>16.0f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from shenase import async_crud
+from shenase.database import session_scope
+from shenase.config import (
+    SESSION_EXPIRE_DAYS,
+    SESSION_EXTEND_AFTER_FRACTION,
+    SESSION_ACTIVITY_FLUSH_INTERVAL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SessionActivityTracker:
+    def __init__(
+        self,
+        lifetime: timedelta,
+        extend_after_fraction: float,
+        flush_interval: float,
+    ) -> None:
+        self.lifetime = lifetime
+        self.extend_after_fraction = extend_after_fraction
+        self.flush_interval = flush_interval
+        self._last_seen: dict[str, datetime] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.flush_interval > 0
+
+    def touch(self, access_token: str) -> None:
+        if not self.enabled:
+            return
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        with self._lock:
+            self._last_seen[access_token] = now
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._last_seen)
+
+    async def flush(self, db: Session | AsyncSession) -> int:
+        with self._lock:
+            last_seen, self._last_seen = self._last_seen, {}
+        if not last_seen:
+            return 0
+
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        try:
+            return await async_crud.record_session_activity(
+                db=db,
+                last_seen=last_seen,
+                extend_before=now
+                + self.lifetime * (1 - self.extend_after_fraction),
+                new_expires_at=now + self.lifetime,
+            )
+        except Exception:
+            with self._lock:
+                self._last_seen = last_seen | self._last_seen
+            raise
+
+
+async def flush_activity() -> None:
+    async with session_scope() as db:
+        extended = await activity_tracker.flush(db)
+    if extended:
+        logger.info('Extended %d active sessions.', extended)
+
+
+async def run_activity_flusher(
+    interval: float = SESSION_ACTIVITY_FLUSH_INTERVAL_SECONDS,
+) -> None:
+    try:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await flush_activity()
+            except Exception:
+                logger.exception('Session activity flush failed.')
+    finally:
+        await flush_activity()
+
+
+activity_tracker = SessionActivityTracker(
+    lifetime=timedelta(days=SESSION_EXPIRE_DAYS),
+    extend_after_fraction=SESSION_EXTEND_AFTER_FRACTION,
+    flush_interval=SESSION_ACTIVITY_FLUSH_INTERVAL_SECONDS,
+)
@@ -0,0 +1,56 @@
+from functools import wraps
+from typing import Callable, Any, Awaitable
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from shenase import crud
+
+
+def _run_in_session(
+    func: Callable[..., Any],
+) -> Callable[..., Awaitable[Any]]:
+    @wraps(func)
+    async def wrapper(db: Session | AsyncSession, *args: Any, **kwargs: Any):
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(
+                lambda session: func(session, *args, **kwargs)
+            )
+        return await run_in_threadpool(func, db, *args, **kwargs)
+
+    return wrapper
+
+
+get_users = _run_in_session(crud.get_users)
+get_user_by_id = _run_in_session(crud.get_user_by_id)
+get_user_by_username = _run_in_session(crud.get_user_by_username)
+get_user_by_email = _run_in_session(crud.get_user_by_email)
+get_profiles = _run_in_session(crud.get_profiles)
+get_profile_by_id = _run_in_session(crud.get_profile_by_id)
+get_profile_by_username = _run_in_session(crud.get_profile_by_username)
+get_profile_by_user_id = _run_in_session(crud.get_profile_by_user_id)
+get_profile_versions = _run_in_session(crud.get_profile_versions)
+get_profile_version_by_username = _run_in_session(
+    crud.get_profile_version_by_username
+)
+create_user = _run_in_session(crud.create_user)
+import_users = _run_in_session(crud.import_users)
+update_user = _run_in_session(crud.update_user)
+update_user_role = _run_in_session(crud.update_user_role)
+update_user_status = _run_in_session(crud.update_user_status)
+bulk_update_user_roles = _run_in_session(crud.bulk_update_user_roles)
+bulk_update_user_statuses = _run_in_session(crud.bulk_update_user_statuses)
+get_referenced_avatars = _run_in_session(crud.get_referenced_avatars)
+get_role_permissions = _run_in_session(crud.get_role_permissions)
+set_role_permissions = _run_in_session(crud.set_role_permissions)
+seed_role_permissions = _run_in_session(crud.seed_role_permissions)
+get_session_by_access_token = _run_in_session(crud.get_session_by_access_token)
+get_user_sessions = _run_in_session(crud.get_user_sessions)
+create_session = _run_in_session(crud.create_session)
+validate_session = _run_in_session(crud.validate_session)
+record_session_activity = _run_in_session(crud.record_session_activity)
+deactivate_session = _run_in_session(crud.deactivate_session)
+deactivate_session_by_id = _run_in_session(crud.deactivate_session_by_id)
+deactivate_user_sessions = _run_in_session(crud.deactivate_user_sessions)
+get_revocations = _run_in_session(crud.get_revocations)
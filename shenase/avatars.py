@@ -0,0 +1,291 @@
+import argparse
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import re
+import secrets
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from tempfile import SpooledTemporaryFile
+from typing import Any, AsyncIterator, BinaryIO, Optional
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.staticfiles import StaticFiles
+from sqlalchemy.orm import Session
+from starlette.responses import Response
+from starlette.types import Scope
+
+from shenase import crud, utils
+from shenase.database import SessionLocal
+from shenase.storage import TEMP_PREFIX, storage
+from shenase.exceptions import (
+    AvatarTooLargeError,
+    InvalidAvatarError,
+    InvalidUploadUrlError,
+    AvatarUploadNotFoundError,
+)
+from shenase.config import (
+    BASE_DIR,
+    AVATAR_UPLOAD_FOLDER,
+    AVATAR_MAX_SIZE,
+    AVATAR_MAX_PIXELS,
+    AVATAR_GC_GRACE_SECONDS,
+    AVATAR_WORKERS,
+    AVATAR_CACHE_MAX_AGE,
+    AVATAR_UPLOAD_URL_EXPIRE_SECONDS,
+    DEFAULT_AVATAR,
+)
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+
+if Image is None:
+    IMAGE_ERRORS = (OSError, ValueError)
+else:
+    Image.MAX_IMAGE_PIXELS = AVATAR_MAX_PIXELS
+    IMAGE_ERRORS = (OSError, ValueError, Image.DecompressionBombError)
+
+CHUNK_SIZE = 64 * 1024
+SPOOL_SIZE = 1024 * 1024
+HASH_LENGTH = 30
+
+logger = logging.getLogger(__name__)
+avatar_executor = ThreadPoolExecutor(
+    max_workers=AVATAR_WORKERS, thread_name_prefix='avatar'
+)
+
+
+def _get_extension(filename: str | None) -> str:
+    _, extension = os.path.splitext(filename or '')
+    extension = extension.lower()
+    return extension if re.fullmatch(r'\.[a-z0-9]{1,4}', extension) else ''
+
+
+def _get_original_filename(filename: str) -> str:
+    original, size, extension = (filename.rsplit('.', 2) + ['', ''])[:3]
+    if size.isdigit() and extension == utils.AVATAR_DERIVATIVE_FORMAT:
+        return original
+    return filename
+
+
+def _write_avatar(source: BinaryIO, extension: str) -> str:
+    digest = hashlib.sha256()
+    size = 0
+    with SpooledTemporaryFile(max_size=SPOOL_SIZE) as upload:
+        while chunk := source.read(CHUNK_SIZE):
+            size += len(chunk)
+            if size > AVATAR_MAX_SIZE:
+                raise AvatarTooLargeError(AVATAR_MAX_SIZE)
+            digest.update(chunk)
+            upload.write(chunk)
+        upload.seek(0)
+        filename = f'{digest.hexdigest()[:HASH_LENGTH]}{extension}'
+        storage.save(filename, upload)
+    return filename
+
+
+def generate_derivatives(filename: str) -> list[str]:
+    missing_sizes = [
+        size
+        for size in utils.AVATAR_DERIVATIVE_SIZES
+        if not storage.exists(
+            utils.get_avatar_derivative_filename(filename, size)
+        )
+    ]
+    if not missing_sizes:
+        return []
+
+    derivatives = []
+    with storage.open(filename) as source, Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+        for size in missing_sizes:
+            derivative = utils.get_avatar_derivative_filename(filename, size)
+            thumbnail = ImageOps.fit(
+                image, (size, size), Image.Resampling.LANCZOS
+            )
+            buffer = io.BytesIO()
+            thumbnail.save(
+                buffer, format=utils.AVATAR_DERIVATIVE_FORMAT, quality=80
+            )
+            buffer.seek(0)
+            storage.save(derivative, buffer)
+            derivatives.append(derivative)
+    return derivatives
+
+
+def install_default_avatar() -> None:
+    if not storage.exists(DEFAULT_AVATAR):
+        with open(
+            os.path.join(BASE_DIR, AVATAR_UPLOAD_FOLDER, DEFAULT_AVATAR), 'rb'
+        ) as source:
+            storage.save(DEFAULT_AVATAR, source)
+    if utils.AVATAR_DERIVATIVE_SIZES:
+        generate_derivatives(DEFAULT_AVATAR)
+
+
+async def _process_avatar(filename: str) -> None:
+    if not utils.AVATAR_DERIVATIVE_SIZES:
+        return
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(
+            avatar_executor, generate_derivatives, filename
+        )
+    except IMAGE_ERRORS as e:
+        raise InvalidAvatarError from e
+
+
+async def save_avatar(file: UploadFile) -> str:
+    await file.seek(0)
+    filename = await run_in_threadpool(
+        _write_avatar, file.file, _get_extension(file.filename)
+    )
+    await _process_avatar(filename)
+    return filename
+
+
+def create_upload(user_id: int, filename: Optional[str]) -> dict[str, Any]:
+    key = f'{secrets.token_hex(HASH_LENGTH // 2)}{_get_extension(filename)}'
+    issued_at = int(time.time())
+    return {
+        'key': key,
+        'token': f'{issued_at}.{utils.sign(f"{user_id}:{key}:{issued_at}")}',
+        'expires_at': datetime.fromtimestamp(issued_at, timezone.utc)
+        + timedelta(seconds=AVATAR_UPLOAD_URL_EXPIRE_SECONDS),
+        **storage.create_upload(key, AVATAR_UPLOAD_URL_EXPIRE_SECONDS),
+    }
+
+
+async def receive_upload(
+    filename: str,
+    expires: int,
+    signature: str,
+    chunks: AsyncIterator[bytes],
+) -> None:
+    if expires < time.time() or not utils.verify_signature(
+        f'{filename}:{expires}', signature
+    ):
+        raise InvalidUploadUrlError
+
+    with SpooledTemporaryFile(max_size=SPOOL_SIZE) as upload:
+        size = 0
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > AVATAR_MAX_SIZE:
+                raise AvatarTooLargeError(AVATAR_MAX_SIZE)
+            upload.write(chunk)
+        if size == 0:
+            raise InvalidAvatarError
+        upload.seek(0)
+        await run_in_threadpool(storage.save, filename, upload)
+
+
+async def record_upload(user_id: int, key: str, token: str) -> str:
+    issued_at, _, signature = token.partition('.')
+    if (
+        not issued_at.isdigit()
+        or time.time() - int(issued_at) > AVATAR_UPLOAD_URL_EXPIRE_SECONDS
+        or not utils.verify_signature(
+            f'{user_id}:{key}:{issued_at}', signature
+        )
+        or not await run_in_threadpool(storage.exists, key)
+    ):
+        raise AvatarUploadNotFoundError
+    try:
+        await _process_avatar(key)
+    except InvalidAvatarError:
+        await run_in_threadpool(storage.delete, key)
+        raise
+    return key
+
+
+def collect_orphaned_avatars(
+    db: Session,
+    grace_seconds: float = AVATAR_GC_GRACE_SECONDS,
+) -> list[str]:
+    cutoff = time.time() - grace_seconds
+    candidates = [
+        filename
+        for filename, modified_at in storage.list()
+        if _get_original_filename(filename) != DEFAULT_AVATAR
+        and modified_at < cutoff
+    ]
+    referenced = crud.get_referenced_avatars(
+        db, list({_get_original_filename(name) for name in candidates})
+    )
+
+    removed = []
+    for filename in candidates:
+        if _get_original_filename(filename) in referenced:
+            continue
+        modified_at = storage.modified_at(filename)
+        if modified_at is not None and modified_at < cutoff:
+            storage.delete(filename)
+            removed.append(filename)
+    return removed
+
+
+def backfill_derivatives() -> int:
+    generated = 0
+    for filename, _ in storage.list():
+        if (
+            filename.startswith(TEMP_PREFIX)
+            or _get_original_filename(filename) != filename
+        ):
+            continue
+        try:
+            generated += len(generate_derivatives(filename))
+        except IMAGE_ERRORS:
+            logger.warning('Could not process avatar `%s`.', filename)
+    return generated
+
+
+class AvatarStaticFiles(StaticFiles):
+    def file_response(
+        self,
+        full_path: str,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = super().file_response(
+            full_path, stat_result, scope, status_code
+        )
+        filename = _get_original_filename(os.path.basename(full_path))
+        response.headers['Cache-Control'] = (
+            'public, max-age=3600'
+            if filename == DEFAULT_AVATAR
+            else f'public, max-age={AVATAR_CACHE_MAX_AGE}, immutable'
+        )
+        return response
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Maintain stored avatars.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    gc_parser = subparsers.add_parser(
+        'gc', help='Remove avatar files that no profile references.'
+    )
+    gc_parser.add_argument(
+        '--grace-seconds', type=float, default=AVATAR_GC_GRACE_SECONDS
+    )
+    subparsers.add_parser('derive', help='Generate missing resized avatars.')
+    args = parser.parse_args()
+
+    if args.command == 'gc':
+        with SessionLocal() as db:
+            removed = collect_orphaned_avatars(db, args.grace_seconds)
+        print(f'Removed {len(removed)} orphaned avatars.')
+    else:
+        print(f'Generated {backfill_derivatives()} resized avatars.')
+
+
+if __name__ == '__main__':
+    main()
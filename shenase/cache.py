@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional
+
+from shenase import schemas
+from shenase.config import SESSION_CACHE_MAX_SIZE, SESSION_CACHE_TTL_SECONDS
+
+
+@dataclass(slots=True)
+class _CacheEntry:
+    client_fingerprint: str
+    user: schemas.User
+    deadline: float
+
+
+class SessionCache:
+    def __init__(self, max_size: int, ttl: float) -> None:
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, _CacheEntry] = OrderedDict()
+        self._user_tokens: dict[int, set[str]] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0 and self.ttl > 0
+
+    def get(
+        self,
+        access_token: str,
+        client_fingerprint: str,
+    ) -> Optional[schemas.User]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(access_token)
+            if entry is None or entry.client_fingerprint != client_fingerprint:
+                self.misses += 1
+                return None
+            elif entry.deadline <= time.monotonic():
+                self._remove(access_token)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(access_token)
+            self.hits += 1
+            return entry.user
+
+    def set(
+        self,
+        access_token: str,
+        client_fingerprint: str,
+        user: schemas.User,
+        expires_at: datetime,
+    ) -> None:
+        if not self.enabled:
+            return
+        remaining = (
+            expires_at.replace(tzinfo=timezone.utc)
+            - datetime.now(timezone.utc)
+        ).total_seconds()
+        if remaining <= 0:
+            return
+        with self._lock:
+            if access_token in self._entries:
+                self._remove(access_token)
+            self._entries[access_token] = _CacheEntry(
+                client_fingerprint=client_fingerprint,
+                user=user,
+                deadline=time.monotonic() + min(self.ttl, remaining),
+            )
+            self._user_tokens.setdefault(user.id, set()).add(access_token)
+            while len(self._entries) > self.max_size:
+                oldest_token = next(iter(self._entries))
+                self._remove(oldest_token)
+                self.evictions += 1
+
+    def invalidate_token(self, access_token: str) -> None:
+        with self._lock:
+            if access_token in self._entries:
+                self._remove(access_token)
+
+    def invalidate_user(self, user_id: int) -> None:
+        with self._lock:
+            for access_token in self._user_tokens.pop(user_id, set()):
+                self._entries.pop(access_token, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._user_tokens.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _remove(self, access_token: str) -> None:
+        entry = self._entries.pop(access_token)
+        user_tokens = self._user_tokens.get(entry.user.id)
+        if user_tokens is not None:
+            user_tokens.discard(access_token)
+            if not user_tokens:
+                del self._user_tokens[entry.user.id]
+
+
+session_cache = SessionCache(
+    max_size=SESSION_CACHE_MAX_SIZE,
+    ttl=SESSION_CACHE_TTL_SECONDS,
+)
@@ -8,11 +8,138 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
 DEBUG_ENABLED = os.environ['DEBUG_ENABLED'] == '1'
 
+SECRET_KEY = os.environ['SECRET_KEY']
+
 DATABASE_URL = os.environ['DATABASE_URL']
 TEST_DATABASE_URL = os.environ['TEST_DATABASE_URL']
+DATABASE_ASYNC_ENABLED = os.environ.get('DATABASE_ASYNC_ENABLED') == '1'
+ASYNC_DATABASE_URL = os.environ.get('ASYNC_DATABASE_URL')
+READ_REPLICA_DATABASE_URL = os.environ.get('READ_REPLICA_DATABASE_URL')
+
+DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE', 5))
+DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW', 10))
+DB_POOL_TIMEOUT = float(os.environ.get('DB_POOL_TIMEOUT', 30))
+DB_POOL_RECYCLE = int(os.environ.get('DB_POOL_RECYCLE', 1800))
+DB_POOL_PRE_PING = os.environ.get('DB_POOL_PRE_PING', '1') == '1'
 
 SESSION_EXPIRE_DAYS = int(os.environ['SESSION_EXPIRE_DAYS'])
+MAX_ACTIVE_SESSIONS_PER_USER = int(
+    os.environ.get('MAX_ACTIVE_SESSIONS_PER_USER', 10)
+)
+SESSION_EXTEND_AFTER_FRACTION = float(
+    os.environ.get('SESSION_EXTEND_AFTER_FRACTION', 0.5)
+)
+SESSION_ACTIVITY_FLUSH_INTERVAL_SECONDS = float(
+    os.environ.get('SESSION_ACTIVITY_FLUSH_INTERVAL_SECONDS', 60)
+)
+
+ACCESS_TOKEN_MODE = os.environ.get('ACCESS_TOKEN_MODE', 'opaque')
+REVOCATION_REFRESH_INTERVAL_SECONDS = float(
+    os.environ.get('REVOCATION_REFRESH_INTERVAL_SECONDS', 5)
+)
+
+SESSION_SWEEP_INTERVAL_SECONDS = float(
+    os.environ.get('SESSION_SWEEP_INTERVAL_SECONDS', 3600)
+)
+SESSION_SWEEP_BATCH_SIZE = int(
+    os.environ.get('SESSION_SWEEP_BATCH_SIZE', 1000)
+)
+SESSION_RETENTION_DAYS = int(os.environ.get('SESSION_RETENTION_DAYS', 30))
+
+PERMISSIONS_REFRESH_INTERVAL_SECONDS = float(
+    os.environ.get('PERMISSIONS_REFRESH_INTERVAL_SECONDS', 30)
+)
+
+LOGIN_RATE_LIMIT_BACKEND = os.environ.get('LOGIN_RATE_LIMIT_BACKEND', 'memory')
+LOGIN_RATE_LIMIT_REDIS_URL = os.environ.get('LOGIN_RATE_LIMIT_REDIS_URL')
+LOGIN_USERNAME_BURST = int(os.environ.get('LOGIN_USERNAME_BURST', 10))
+LOGIN_USERNAME_RATE_PER_MINUTE = float(
+    os.environ.get('LOGIN_USERNAME_RATE_PER_MINUTE', 5)
+)
+LOGIN_CLIENT_BURST = int(os.environ.get('LOGIN_CLIENT_BURST', 20))
+LOGIN_CLIENT_RATE_PER_MINUTE = float(
+    os.environ.get('LOGIN_CLIENT_RATE_PER_MINUTE', 30)
+)
+
+SESSION_CACHE_MAX_SIZE = int(os.environ.get('SESSION_CACHE_MAX_SIZE', 10000))
+SESSION_CACHE_TTL_SECONDS = float(
+    os.environ.get('SESSION_CACHE_TTL_SECONDS', 60)
+)
+
+PAGE_SIZE_DEFAULT = int(os.environ.get('PAGE_SIZE_DEFAULT', 50))
+PAGE_SIZE_MAX = int(os.environ.get('PAGE_SIZE_MAX', 200))
+
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED') == '1'
+
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200))
+QUERY_REPEAT_THRESHOLD = int(os.environ.get('QUERY_REPEAT_THRESHOLD', 5))
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED') == '1'
+
+PROFILE_CACHE_CONTROL = os.environ.get(
+    'PROFILE_CACHE_CONTROL', 'public, max-age=60, stale-while-revalidate=30'
+)
+
+FAST_JSON_RESPONSES_ENABLED = (
+    os.environ.get('FAST_JSON_RESPONSES_ENABLED') == '1'
+)
+RESPONSE_COMPRESSION_MIN_SIZE = int(
+    os.environ.get('RESPONSE_COMPRESSION_MIN_SIZE', 1024)
+)
+RESPONSE_COMPRESSION_GZIP_LEVEL = int(
+    os.environ.get('RESPONSE_COMPRESSION_GZIP_LEVEL', 6)
+)
+RESPONSE_COMPRESSION_BROTLI_QUALITY = int(
+    os.environ.get('RESPONSE_COMPRESSION_BROTLI_QUALITY', 4)
+)
+
+BULK_UPDATE_MAX_ITEMS = int(os.environ.get('BULK_UPDATE_MAX_ITEMS', 10000))
+BULK_UPDATE_BATCH_SIZE = int(os.environ.get('BULK_UPDATE_BATCH_SIZE', 500))
+
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+IMPORT_HASHING_MAX_WAIT_SECONDS = float(
+    os.environ.get('IMPORT_HASHING_MAX_WAIT_SECONDS', 30)
+)
+IMPORT_MAX_REPORTED_ERRORS = int(
+    os.environ.get('IMPORT_MAX_REPORTED_ERRORS', 1000)
+)
+
+PASSWORD_HASHING_EXECUTOR = os.environ.get(
+    'PASSWORD_HASHING_EXECUTOR', 'thread'
+)
+PASSWORD_HASHING_WORKERS = int(
+    os.environ.get('PASSWORD_HASHING_WORKERS', os.cpu_count() or 1)
+)
+PASSWORD_HASHING_MAX_QUEUE = int(
+    os.environ.get('PASSWORD_HASHING_MAX_QUEUE', 64)
+)
 
 AVATAR_UPLOAD_FOLDER = os.environ['AVATAR_UPLOAD_FOLDER']
-AVATAR_STORAGE_PATH = os.path.join(BASE_DIR, AVATAR_UPLOAD_FOLDER)
+AVATAR_STORAGE_PATH = os.environ.get(
+    'AVATAR_STORAGE_PATH', os.path.join(BASE_DIR, AVATAR_UPLOAD_FOLDER)
+)
 DEFAULT_AVATAR = os.environ['DEFAULT_AVATAR']
+AVATAR_MAX_SIZE = int(os.environ.get('AVATAR_MAX_SIZE', 2 * 1024 * 1024))
+AVATAR_GC_GRACE_SECONDS = float(
+    os.environ.get('AVATAR_GC_GRACE_SECONDS', 3600)
+)
+AVATAR_SIZES = tuple(
+    int(size)
+    for size in os.environ.get('AVATAR_SIZES', '64,128,256').split(',')
+    if size
+)
+AVATAR_MAX_PIXELS = int(os.environ.get('AVATAR_MAX_PIXELS', 4096 * 4096))
+AVATAR_WORKERS = int(os.environ.get('AVATAR_WORKERS', 2))
+AVATAR_FILE_MODE = int(os.environ.get('AVATAR_FILE_MODE', '644'), 8)
+AVATAR_CACHE_MAX_AGE = int(os.environ.get('AVATAR_CACHE_MAX_AGE', 31536000))
+
+AVATAR_STORAGE_BACKEND = os.environ.get('AVATAR_STORAGE_BACKEND', 'local')
+AVATAR_PUBLIC_URL = os.environ.get(
+    'AVATAR_PUBLIC_URL', f'/{AVATAR_UPLOAD_FOLDER}'
+).rstrip('/')
+AVATAR_UPLOAD_URL_EXPIRE_SECONDS = int(
+    os.environ.get('AVATAR_UPLOAD_URL_EXPIRE_SECONDS', 300)
+)
+AVATAR_S3_BUCKET = os.environ.get('AVATAR_S3_BUCKET')
+AVATAR_S3_PREFIX = os.environ.get('AVATAR_S3_PREFIX', '')
+AVATAR_S3_ENDPOINT_URL = os.environ.get('AVATAR_S3_ENDPOINT_URL')
+AVATAR_S3_REGION = os.environ.get('AVATAR_S3_REGION')
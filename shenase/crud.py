@@ -1,41 +1,84 @@
-import os
-import shutil
-import uuid
-from datetime import datetime, timezone
-from typing import Optional
-
-from fastapi import UploadFile
-from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Any
+
+from fastapi import HTTPException
+from sqlalchemy import select, insert, update, delete, bindparam, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import (
+    Session,
+    Query,
+    InstrumentedAttribute,
+    joinedload,
+    selectinload,
+)
 
 from shenase import models, schemas, enums, utils
+from shenase.cache import session_cache
+from shenase.metrics import metrics
+from shenase.revocation import revocation_list
 from shenase.exceptions import (
     UserNotFoundError,
     UsernameAlreadyExistsError,
     EmailAlreadyExistsError,
+    UserCreationError,
 )
-from shenase.config import AVATAR_STORAGE_PATH
 
 
-def get_users(db: Session) -> Optional[list[models.User]]:
-    return db.query(models.User).all()
+def get_users(
+    db: Session,
+    limit: int,
+    after_id: Optional[int] = None,
+    order: enums.SortOrder = enums.SortOrder.ASC,
+    role: Optional[enums.UserRole] = None,
+    status: Optional[enums.UserStatus] = None,
+    is_verified: Optional[bool] = None,
+) -> list[models.User]:
+    query = db.query(models.User).options(selectinload(models.User.profile))
+    if role is not None:
+        query = query.filter(models.User.role == role)
+    if status is not None:
+        query = query.filter(models.User.status == status)
+    if is_verified is not None:
+        query = query.filter(models.User.is_verified == is_verified)
+    return _paginate(query, models.User.id, limit, after_id, order)
 
 
 def get_user_by_id(db: Session, user_id: int) -> Optional[models.User]:
-    return db.query(models.User).filter(models.User.id == user_id).first()
+    return (
+        db.query(models.User)
+        .options(joinedload(models.User.profile))
+        .filter(models.User.id == user_id)
+        .first()
+    )
 
 
 def get_user_by_username(db: Session, username: str) -> Optional[models.User]:
     return (
-        db.query(models.User).filter(models.User.username == username).first()
+        db.query(models.User)
+        .options(joinedload(models.User.profile))
+        .filter(models.User.username == username)
+        .first()
     )
 
 
 def get_user_by_email(db: Session, email: str) -> Optional[models.User]:
-    return db.query(models.User).filter(models.User.email == email).first()
+    return (
+        db.query(models.User)
+        .options(joinedload(models.User.profile))
+        .filter(models.User.email == email)
+        .first()
+    )
 
 
-def get_profiles(db: Session) -> Optional[list[models.Profile]]:
-    return db.query(models.Profile).all()
+def get_profiles(
+    db: Session,
+    limit: int,
+    after_id: Optional[int] = None,
+    order: enums.SortOrder = enums.SortOrder.ASC,
+) -> list[models.Profile]:
+    return _paginate(
+        db.query(models.Profile), models.Profile.id, limit, after_id, order
+    )
 
 
 def get_profile_by_id(
@@ -61,6 +104,38 @@ def get_profile_by_username(
     )
 
 
+def get_profile_versions(
+    db: Session,
+    limit: int,
+    after_id: Optional[int] = None,
+    order: enums.SortOrder = enums.SortOrder.ASC,
+) -> list[Any]:
+    return _paginate(
+        db.query(
+            models.Profile.id,
+            models.Profile.version,
+            models.Profile.updated_at,
+        ),
+        models.Profile.id,
+        limit,
+        after_id,
+        order,
+    )
+
+
+def get_profile_version_by_username(db: Session, username: str) -> Any:
+    return (
+        db.query(
+            models.Profile.id,
+            models.Profile.version,
+            models.Profile.updated_at,
+        )
+        .join(models.User)
+        .filter(models.User.username == username)
+        .first()
+    )
+
+
 def get_profile_by_user_id(
     db: Session,
     user_id: int,
@@ -75,74 +150,135 @@ def get_profile_by_user_id(
 def create_user(
     db: Session,
     user: schemas.UserCreate,
+    hashed_password: Optional[str] = None,
+    avatar: Optional[str] = None,
 ) -> models.User:
-    if get_user_by_username(db, user.username) is not None:
-        raise UsernameAlreadyExistsError(user.username)
-    elif get_user_by_email(db, user.email) is not None:
-        raise EmailAlreadyExistsError(user.email)
-
     db_user = models.User(
         username=user.username,
         email=user.email,
-        hashed_password=utils.get_password_hash(user.password),
+        hashed_password=(
+            hashed_password or utils.get_password_hash(user.password)
+        ),
+        profile=models.Profile(
+            display_name=user.display_name,
+            avatar=avatar,
+            bio=user.bio,
+            location=user.location,
+        ),
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    _commit_user(db, db_user.username, db_user.email)
+    return db_user
 
-    avatar_file_path = (
-        save_avatar(db, db_user.id, user.avatar)
-        if user.avatar is not None
-        else None
+
+def import_users(
+    db: Session,
+    users: list[dict[str, Any]],
+) -> list[Optional[str]]:
+    errors: list[Optional[str]] = [None] * len(users)
+    usernames = {user['username'] for user in users}
+    emails = {user['email'] for user in users}
+    taken_usernames = set(
+        db.scalars(
+            select(models.User.username).where(
+                models.User.username.in_(usernames)
+            )
+        )
     )
-    db_profile = models.Profile(
-        display_name=user.display_name,
-        avatar=avatar_file_path,
-        bio=user.bio,
-        location=user.location,
-        user_id=db_user.id,
+    taken_emails = set(
+        db.scalars(
+            select(models.User.email).where(models.User.email.in_(emails))
+        )
+    )
+    for i, user in enumerate(users):
+        if user['username'] in taken_usernames:
+            errors[i] = UsernameAlreadyExistsError(user['username']).detail
+        elif user['email'] in taken_emails:
+            errors[i] = EmailAlreadyExistsError(user['email']).detail
+        taken_usernames.add(user['username'])
+        taken_emails.add(user['email'])
+
+    pending = [i for i, error in enumerate(errors) if error is None]
+    try:
+        _insert_users(db, [users[i] for i in pending])
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        for i in pending:
+            try:
+                with db.begin_nested():
+                    _insert_users(db, [users[i]])
+            except IntegrityError as e:
+                errors[i] = (
+                    _get_integrity_error(
+                        e, users[i]['username'], users[i]['email']
+                    )
+                    or UserCreationError()
+                ).detail
+        db.commit()
+    return errors
+
+
+def _insert_users(db: Session, users: list[dict[str, Any]]) -> None:
+    if not users:
+        return
+    user_ids = db.scalars(
+        insert(models.User).returning(
+            models.User.id, sort_by_parameter_order=True
+        ),
+        [
+            {
+                'username': user['username'],
+                'email': user['email'],
+                'hashed_password': user['hashed_password'],
+            }
+            for user in users
+        ],
+    ).all()
+    db.execute(
+        insert(models.Profile),
+        [
+            {
+                'user_id': user_id,
+                'display_name': user['display_name'],
+                'bio': user.get('bio'),
+                'location': user.get('location'),
+            }
+            for user_id, user in zip(user_ids, users)
+        ],
     )
-    db.add(db_profile)
-    db.commit()
-    db.refresh(db_profile)
-
-    return db_user
 
 
 def update_user(
     db: Session,
     user: schemas.UserProfileUpdate,
-    current_user: models.User,
+    current_user: models.User | schemas.User,
+    hashed_password: Optional[str] = None,
+    avatar: Optional[str] = None,
 ) -> models.User:
-    if (
-        user.username is not None
-        and get_user_by_username(db, user.username) is not None
-    ):
-        raise UsernameAlreadyExistsError(user.username)
-    elif (
-        user.email is not None
-        and get_user_by_email(db, user.email) is not None
-    ):
-        raise EmailAlreadyExistsError(user.email)
+    db_user = get_user_by_id(db, current_user.id)
+    if db_user is None:
+        raise UserNotFoundError(current_user.username)
 
-    current_user.username = user.username or current_user.username
-    current_user.email = user.email or current_user.email
+    db_user.username = user.username or db_user.username
+    db_user.email = user.email or db_user.email
     if user.password is not None:
-        current_user.password = utils.get_password_hash(user.password)
-    current_user.profile.display_name = (
-        user.display_name or current_user.profile.display_name
-    )
-    current_user.profile.bio = user.bio or current_user.profile.bio
-    current_user.profile.location = (
-        user.location or current_user.profile.location
+        db_user.hashed_password = hashed_password or utils.get_password_hash(
+            user.password
+        )
+    db_user.profile.display_name = (
+        user.display_name or db_user.profile.display_name
     )
-    if user.avatar is not None:
-        avatar_file_path = save_avatar(db, current_user.id, user.avatar)
-        current_user.profile.avatar = avatar_file_path
-
-    db.commit()
-    db.refresh(current_user)
-    return current_user
+    db_user.profile.bio = user.bio or db_user.profile.bio
+    db_user.profile.location = user.location or db_user.profile.location
+    db_user.profile.avatar = avatar or db_user.profile.avatar
+    if db.is_modified(db_user.profile):
+        db_user.profile.version = (db_user.profile.version or 0) + 1
+        db_user.profile.updated_at = datetime.now(timezone.utc)
+
+    _commit_user(db, db_user.username, db_user.email)
+    session_cache.invalidate_user(db_user.id)
+    return db_user
 
 
 def update_user_role(
@@ -150,14 +286,7 @@ def update_user_role(
     username: str,
     new_role: enums.UserRole,
 ) -> models.User:
-    db_user = get_user_by_username(db, username)
-    if db_user is None:
-        raise UserNotFoundError(username)
-
-    db_user.role = new_role
-    db.commit()
-    db.refresh(db_user)
-    return db_user
+    return _update_user_by_username(db, username, role=new_role)
 
 
 def update_user_status(
@@ -165,45 +294,229 @@ def update_user_status(
     username: str,
     new_status: enums.UserStatus,
 ) -> models.User:
-    db_user = get_user_by_username(db, username)
+    return _update_user_by_username(db, username, status=new_status)
+
+
+def bulk_update_user_roles(
+    db: Session,
+    usernames: list[str],
+    user_ids: list[int],
+    new_role: enums.UserRole,
+    batch_size: int,
+) -> list[tuple[int, str]]:
+    return _bulk_update_users(
+        db, usernames, user_ids, batch_size, role=new_role
+    )
+
+
+def bulk_update_user_statuses(
+    db: Session,
+    usernames: list[str],
+    user_ids: list[int],
+    new_status: enums.UserStatus,
+    batch_size: int,
+) -> list[tuple[int, str]]:
+    return _bulk_update_users(
+        db, usernames, user_ids, batch_size, status=new_status
+    )
+
+
+def _get_integrity_error(
+    error: IntegrityError,
+    username: str,
+    email: str,
+) -> Optional[HTTPException]:
+    message = str(error.orig).lower()
+    if 'username' in message:
+        return UsernameAlreadyExistsError(username)
+    elif 'email' in message:
+        return EmailAlreadyExistsError(email)
+    return None
+
+
+def _commit_user(db: Session, username: str, email: str) -> None:
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        error = _get_integrity_error(e, username, email)
+        if error is not None:
+            raise error from e
+        raise
+
+
+def _update_user_by_username(
+    db: Session,
+    username: str,
+    **values: Any,
+) -> models.User:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    db_user = db.execute(
+        update(models.User)
+        .where(models.User.username == username)
+        .values(**values, tokens_valid_after=now)
+        .returning(models.User)
+        .execution_options(populate_existing=True)
+    ).scalar_one_or_none()
     if db_user is None:
+        db.rollback()
         raise UserNotFoundError(username)
 
-    db_user.status = new_status
     db.commit()
-    db.refresh(db_user)
+    session_cache.invalidate_user(db_user.id)
+    revocation_list.revoke_user(db_user.id, now)
     return db_user
 
 
-def _create_unique_filename(filename: str) -> str:
-    unique_id = uuid.uuid4().hex[:15]
-    _, file_extension = os.path.splitext(filename)
-    return f'{unique_id}{file_extension}'
+def _bulk_update_users(
+    db: Session,
+    usernames: list[str],
+    user_ids: list[int],
+    batch_size: int,
+    **values: Any,
+) -> list[tuple[int, str]]:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    selected_ids = set(user_ids)
+    for i in range(0, len(usernames), batch_size):
+        selected_ids.update(
+            db.scalars(
+                select(models.User.id).where(
+                    models.User.username.in_(usernames[i : i + batch_size])
+                )
+            )
+        )
+    ids = sorted(selected_ids)
+    updated_users = []
+    for i in range(0, len(ids), batch_size):
+        batch_users = db.execute(
+            update(models.User)
+            .where(models.User.id.in_(ids[i : i + batch_size]))
+            .values(**values, tokens_valid_after=now)
+            .returning(models.User.id, models.User.username)
+            .execution_options(synchronize_session=False)
+        ).all()
+        db.commit()
+        for user_id, _ in batch_users:
+            session_cache.invalidate_user(user_id)
+            revocation_list.revoke_user(user_id, now)
+        updated_users.extend(tuple(row) for row in batch_users)
+    return updated_users
+
+
+def _paginate(
+    query: Query,
+    key: InstrumentedAttribute,
+    limit: int,
+    after_id: Optional[int],
+    order: enums.SortOrder,
+) -> list:
+    if order == enums.SortOrder.ASC:
+        if after_id is not None:
+            query = query.filter(key > after_id)
+        query = query.order_by(key.asc())
+    else:
+        if after_id is not None:
+            query = query.filter(key < after_id)
+        query = query.order_by(key.desc())
+    return query.limit(limit).all()
+
+
+def get_referenced_avatars(
+    db: Session,
+    filenames: list[str],
+    batch_size: int = 500,
+) -> set[str]:
+    referenced = set()
+    for i in range(0, len(filenames), batch_size):
+        referenced.update(
+            db.scalars(
+                select(models.Profile.avatar)
+                .where(
+                    models.Profile.avatar.in_(filenames[i : i + batch_size])
+                )
+                .distinct()
+            )
+        )
+    return referenced
 
 
-def save_avatar(db: Session, user_id: int, file: UploadFile) -> str:
-    filename = _create_unique_filename(file.filename)
-    file_path = os.path.join(AVATAR_STORAGE_PATH, filename)
-    with open(file_path, 'wb') as f:
-        shutil.copyfileobj(file.file, f)
+def get_role_permissions(db: Session) -> list[tuple[enums.UserRole, str]]:
+    return [
+        tuple(row)
+        for row in db.execute(
+            select(
+                models.RolePermission.role, models.RolePermission.permission
+            )
+        )
+    ]
 
-    db_profile = get_profile_by_user_id(db, user_id)
-    if db_profile is not None:
-        db_profile.avatar = filename
-        db.commit()
-        db.refresh(db_profile)
 
-    return filename
+def set_role_permissions(
+    db: Session,
+    role: enums.UserRole,
+    permissions: list[str],
+) -> None:
+    db.execute(
+        delete(models.RolePermission).where(models.RolePermission.role == role)
+    )
+    if permissions:
+        db.execute(
+            insert(models.RolePermission),
+            [
+                {'role': role, 'permission': permission}
+                for permission in permissions
+            ],
+        )
+    db.commit()
+
+
+def seed_role_permissions(
+    db: Session,
+    role_permissions: dict[enums.UserRole, list[str]],
+) -> bool:
+    if db.scalar(select(models.RolePermission.id).limit(1)) is not None:
+        return False
+    try:
+        db.execute(
+            insert(models.RolePermission),
+            [
+                {'role': role, 'permission': permission}
+                for role, permissions in role_permissions.items()
+                for permission in permissions
+            ],
+        )
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        return False
+    return True
 
 
 def get_session_by_access_token(
     db: Session,
     access_token: str,
+    with_user: bool = False,
 ) -> Optional[models.Session]:
-    return (
-        db.query(models.Session)
-        .filter(models.Session.access_token == access_token)
-        .first()
+    query = db.query(models.Session)
+    if with_user:
+        query = query.options(
+            joinedload(models.Session.user).joinedload(models.User.profile)
+        )
+    return query.filter(models.Session.access_token == access_token).first()
+
+
+def get_user_sessions(db: Session, user_id: int) -> list[models.Session]:
+    return list(
+        db.scalars(
+            select(models.Session)
+            .where(
+                models.Session.user_id == user_id,
+                models.Session.status == enums.SessionStatus.ACTIVE,
+                models.Session.expires_at
+                > datetime.now(timezone.utc).replace(tzinfo=None),
+            )
+            .order_by(models.Session.id.desc())
+        )
     )
 
 
@@ -211,14 +524,31 @@ def create_session(
     db: Session,
     user_id: int,
     client_fingerprint: str,
+    max_active_sessions: int = 0,
 ) -> models.Session:
     db_session = models.Session(
         client_fingerprint=client_fingerprint,
         user_id=user_id,
     )
     db.add(db_session)
+    evicted_sessions = []
+    if max_active_sessions > 0:
+        db.flush()
+        evicted_sessions = _revoke_sessions(
+            db,
+            models.Session.id.in_(
+                select(models.Session.id)
+                .where(
+                    models.Session.user_id == user_id,
+                    models.Session.status == enums.SessionStatus.ACTIVE,
+                )
+                .order_by(models.Session.id.desc())
+                .offset(max_active_sessions)
+                .scalar_subquery()
+            ),
+        )
     db.commit()
-    db.refresh(db_session)
+    _publish_revocations(evicted_sessions)
     return db_session
 
 
@@ -227,33 +557,184 @@ def validate_session(
     access_token: str,
     client_fingerprint: str,
 ) -> Optional[models.Session]:
-    session = get_session_by_access_token(db, access_token)
-    if (
-        session is None
-        or session.status
-        in (
-            enums.SessionStatus.INACTIVE,
-            enums.SessionStatus.EXPIRED,
-        )
-        or session.client_fingerprint != client_fingerprint
+    session = get_session_by_access_token(db, access_token, with_user=True)
+    if session is None:
+        outcome = 'not_found'
+    elif session.status in (
+        enums.SessionStatus.INACTIVE,
+        enums.SessionStatus.EXPIRED,
     ):
-        return None
+        outcome = 'inactive'
+    elif session.client_fingerprint != client_fingerprint:
+        outcome = 'fingerprint_mismatch'
     elif session.expires_at.replace(tzinfo=timezone.utc) <= datetime.now(
         timezone.utc
     ):
         session.status = enums.SessionStatus.EXPIRED
         db.commit()
+        outcome = 'expired'
+    else:
+        outcome = 'valid'
+    metrics.record_session_validation(outcome)
+    return session if outcome == 'valid' else None
 
-    # session.expires_at = datetime.now(timezone.utc) + timedelta(
-    #     days=SESSION_EXPIRE_DAYS
-    # )
-    # db.commit()
 
-    return session
+def record_session_activity(
+    db: Session,
+    last_seen: dict[str, datetime],
+    extend_before: datetime,
+    new_expires_at: datetime,
+    batch_size: int = 500,
+) -> int:
+    sessions = models.Session.__table__
+    access_tokens = list(last_seen)
+    extended = 0
+    for i in range(0, len(access_tokens), batch_size):
+        batch_tokens = access_tokens[i : i + batch_size]
+        db.execute(
+            update(sessions)
+            .where(sessions.c.access_token == bindparam('token'))
+            .values(last_seen_at=bindparam('seen_at')),
+            [
+                {'token': access_token, 'seen_at': last_seen[access_token]}
+                for access_token in batch_tokens
+            ],
+        )
+        result = db.execute(
+            update(models.Session)
+            .where(
+                models.Session.access_token.in_(batch_tokens),
+                models.Session.status == enums.SessionStatus.ACTIVE,
+                models.Session.expires_at < extend_before,
+            )
+            .values(expires_at=new_expires_at)
+            .execution_options(synchronize_session=False)
+        )
+        extended += result.rowcount
+    db.commit()
+    return extended
 
 
 def deactivate_session(db: Session, access_token: str) -> None:
-    session = get_session_by_access_token(db, access_token)
-    if session is not None:
-        session.status = enums.SessionStatus.INACTIVE
+    _deactivate_sessions(db, models.Session.access_token == access_token)
+    session_cache.invalidate_token(access_token)
+
+
+def deactivate_session_by_id(db: Session, session_id: int) -> None:
+    _deactivate_sessions(db, models.Session.id == session_id)
+
+
+def deactivate_user_sessions(
+    db: Session,
+    user_id: int,
+    except_session_id: Optional[int] = None,
+) -> int:
+    criteria = [
+        models.Session.user_id == user_id,
+        models.Session.status == enums.SessionStatus.ACTIVE,
+    ]
+    if except_session_id is not None:
+        criteria.append(models.Session.id != except_session_id)
+    return _deactivate_sessions(db, *criteria)
+
+
+def _deactivate_sessions(db: Session, *criteria: Any) -> int:
+    revoked_sessions = _revoke_sessions(db, *criteria)
+    db.commit()
+    _publish_revocations(revoked_sessions)
+    return len(revoked_sessions)
+
+
+def _revoke_sessions(
+    db: Session,
+    *criteria: Any,
+) -> list[tuple[int, str, datetime]]:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [
+        tuple(row)
+        for row in db.execute(
+            update(models.Session)
+            .where(*criteria, models.Session.revoked_at.is_(None))
+            .values(status=enums.SessionStatus.INACTIVE, revoked_at=now)
+            .returning(
+                models.Session.id,
+                models.Session.access_token,
+                models.Session.expires_at,
+            )
+            .execution_options(synchronize_session=False)
+        )
+    ]
+
+
+def _publish_revocations(
+    revoked_sessions: list[tuple[int, str, datetime]],
+) -> None:
+    for session_id, access_token, expires_at in revoked_sessions:
+        session_cache.invalidate_token(access_token)
+        revocation_list.revoke_session(session_id, expires_at)
+
+
+def get_revocations(
+    db: Session,
+    since: datetime,
+) -> tuple[list[tuple[int, datetime]], list[tuple[int, datetime]]]:
+    sessions = db.execute(
+        select(models.Session.id, models.Session.expires_at).where(
+            models.Session.revoked_at >= since
+        )
+    ).all()
+    users = db.execute(
+        select(models.User.id, models.User.tokens_valid_after).where(
+            models.User.tokens_valid_after >= since
+        )
+    ).all()
+    return [tuple(row) for row in sessions], [tuple(row) for row in users]
+
+
+def expire_sessions(db: Session, now: datetime) -> int:
+    result = db.execute(
+        update(models.Session)
+        .where(
+            models.Session.status == enums.SessionStatus.ACTIVE,
+            models.Session.expires_at <= now,
+        )
+        .values(status=enums.SessionStatus.EXPIRED)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
+
+
+def purge_sessions(
+    db: Session,
+    now: datetime,
+    retention: timedelta,
+    batch_size: int,
+) -> int:
+    purged = 0
+    while True:
+        batch_ids = (
+            select(models.Session.id)
+            .where(
+                models.Session.status.in_(
+                    (
+                        enums.SessionStatus.INACTIVE,
+                        enums.SessionStatus.EXPIRED,
+                    )
+                ),
+                func.coalesce(
+                    models.Session.revoked_at, models.Session.expires_at
+                )
+                <= now - retention,
+            )
+            .limit(batch_size)
+        )
+        result = db.execute(
+            delete(models.Session)
+            .where(models.Session.id.in_(batch_ids.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
         db.commit()
+        purged += result.rowcount
+        if result.rowcount < batch_size:
+            return purged
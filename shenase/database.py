@@ -1,9 +1,134 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from contextlib import asynccontextmanager
+from typing import AsyncGenerator, Optional, Any
 
-from shenase.config import DATABASE_URL
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
 
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+from shenase.querystats import instrument_engine
+from shenase.config import (
+    DATABASE_URL,
+    DATABASE_ASYNC_ENABLED,
+    ASYNC_DATABASE_URL,
+    READ_REPLICA_DATABASE_URL,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+)
+
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'sqlite+pysqlite': 'sqlite+aiosqlite',
+    'postgresql': 'postgresql+asyncpg',
+    'postgresql+psycopg2': 'postgresql+asyncpg',
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    url = make_url(database_url)
+    return url.set(
+        drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    ).render_as_string(hide_password=False)
+
+
+def get_engine_options(database_url: str) -> dict[str, Any]:
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite' and url.database in (
+        None,
+        '',
+        ':memory:',
+    ):
+        return {}
+    return {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING,
+    }
+
+
+engine = create_engine(DATABASE_URL, **get_engine_options(DATABASE_URL))
+read_engine = (
+    create_engine(
+        READ_REPLICA_DATABASE_URL,
+        **get_engine_options(READ_REPLICA_DATABASE_URL),
+    )
+    if READ_REPLICA_DATABASE_URL is not None
+    else engine
+)
+instrument_engine(engine)
+instrument_engine(read_engine)
+SessionLocal = sessionmaker(
+    bind=engine,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+)
+ReadSessionLocal = sessionmaker(
+    bind=read_engine,
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+async_engine: Optional[AsyncEngine] = None
+async_read_engine: Optional[AsyncEngine] = None
+AsyncSessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
+AsyncReadSessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
+if DATABASE_ASYNC_ENABLED:
+    async_database_url = ASYNC_DATABASE_URL or get_async_database_url(
+        DATABASE_URL
+    )
+    async_engine = create_async_engine(
+        async_database_url, **get_engine_options(async_database_url)
+    )
+    async_read_engine = async_engine
+    if READ_REPLICA_DATABASE_URL is not None:
+        async_read_database_url = get_async_database_url(
+            READ_REPLICA_DATABASE_URL
+        )
+        async_read_engine = create_async_engine(
+            async_read_database_url,
+            **get_engine_options(async_read_database_url),
+        )
+    instrument_engine(async_engine.sync_engine)
+    instrument_engine(async_read_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(
+        bind=async_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    AsyncReadSessionLocal = async_sessionmaker(
+        bind=async_read_engine,
+        autoflush=False,
+        expire_on_commit=False,
+    )
 
 Base = declarative_base()
+
+
+@asynccontextmanager
+async def session_scope(
+    read_only: bool = False,
+) -> AsyncGenerator[Session | AsyncSession, None]:
+    if AsyncSessionLocal is not None:
+        async_session_factory = (
+            AsyncReadSessionLocal if read_only else AsyncSessionLocal
+        )
+        async with async_session_factory() as db:
+            yield db
+    else:
+        db = ReadSessionLocal() if read_only else SessionLocal()
+        try:
+            yield db
+        finally:
+            await run_in_threadpool(db.close)
@@ -1,18 +1,22 @@
-from typing import Generator
+from typing import AsyncGenerator, Awaitable, Callable
 from fastapi import Depends, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from shenase import models, enums
-from shenase.database import SessionLocal
-from shenase.exceptions import CredentialsError
+from shenase import schemas, enums
+from shenase.database import session_scope
+from shenase.permissions import permission_table, combine
+from shenase.exceptions import CredentialsError, NotAuthorizedError
 
 
-def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
-    try:
+async def get_db() -> AsyncGenerator[Session | AsyncSession, None]:
+    async with session_scope() as db:
+        yield db
+
+
+async def get_read_db() -> AsyncGenerator[Session | AsyncSession, None]:
+    async with session_scope(read_only=True) as db:
         yield db
-    finally:
-        db.close()
 
 
 async def get_access_token(request: Request) -> str:
@@ -22,7 +26,7 @@ async def get_access_token(request: Request) -> str:
     return access_token
 
 
-async def get_current_user(request: Request) -> models.User:
+async def get_current_user(request: Request) -> schemas.User:
     user = request.state.user
     if user is None:
         raise CredentialsError
@@ -30,8 +34,23 @@ async def get_current_user(request: Request) -> models.User:
 
 
 async def get_current_active_user(
-    current_user: models.User = Depends(get_current_user),
-) -> models.User:
+    current_user: schemas.User = Depends(get_current_user),
+) -> schemas.User:
     if current_user.status != enums.UserStatus.ACTIVE:
         raise CredentialsError
     return current_user
+
+
+def permission_required(
+    *permissions: enums.Permission,
+) -> Callable[..., Awaitable[schemas.User]]:
+    required = combine(permissions)
+
+    async def check_permissions(
+        current_user: schemas.User = Depends(get_current_active_user),
+    ) -> schemas.User:
+        if not permission_table.has(current_user.role, required):
+            raise NotAuthorizedError
+        return current_user
+
+    return check_permissions
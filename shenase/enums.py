@@ -1,4 +1,4 @@
-from enum import StrEnum, auto
+from enum import IntFlag, StrEnum, auto
 
 
 class UserRole(StrEnum):
@@ -13,7 +13,25 @@ class UserStatus(StrEnum):
     SUSPENDED = auto()
 
 
+class Permission(IntFlag):
+    READ_USERS = auto()
+    CHANGE_USER_ROLE = auto()
+    CHANGE_USER_STATUS = auto()
+    IMPORT_USERS = auto()
+    MANAGE_ROLES = auto()
+
+
 class SessionStatus(StrEnum):
     ACTIVE = auto()
     INACTIVE = auto()
     EXPIRED = auto()
+
+
+class SortOrder(StrEnum):
+    ASC = auto()
+    DESC = auto()
+
+
+class ImportFormat(StrEnum):
+    CSV = auto()
+    NDJSON = auto()
@@ -49,6 +49,54 @@ class UserUpdateError(HTTPException):
         )
 
 
+class InvalidCursorError(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Invalid pagination cursor.',
+        )
+
+
+class AvatarTooLargeError(HTTPException):
+    def __init__(self, max_size: int) -> None:
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f'Avatar exceeds the maximum size of {max_size} bytes.',
+        )
+
+
+class InvalidAvatarError(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail='Avatar is not a valid image.',
+        )
+
+
+class InvalidUploadUrlError(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail='Upload URL is invalid or has expired.',
+        )
+
+
+class AvatarUploadNotFoundError(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Avatar upload not found.',
+        )
+
+
+class UnsupportedImportFormatError(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail='Only NDJSON imports can be sent as the request body.',
+        )
+
+
 class NotAuthorizedError(HTTPException):
     def __init__(self) -> None:
         super().__init__(
@@ -73,3 +121,37 @@ class CredentialsError(HTTPException):
             detail='Could not validate credentials.',
             headers={'WWW-Authenticate': 'Bearer'},
         )
+
+
+class PasswordHashingUnavailableError(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail='Server is busy. Please try again shortly.',
+            headers={'Retry-After': '1'},
+        )
+
+
+class TooManyLoginAttemptsError(HTTPException):
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail='Too many login attempts. Please try again later.',
+            headers={'Retry-After': str(retry_after)},
+        )
+
+
+class RoleManagementLockoutError(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_409_CONFLICT,
+            detail='You cannot remove MANAGE_ROLES from your own role.',
+        )
+
+
+class MetricsDisabledError(HTTPException):
+    def __init__(self) -> None:
+        super().__init__(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail='Metrics are disabled.',
+        )
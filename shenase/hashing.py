@@ -0,0 +1,112 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import (
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+)
+from typing import Callable, Any, Optional
+
+from shenase import utils
+from shenase.metrics import metrics
+from shenase.exceptions import PasswordHashingUnavailableError
+from shenase.config import (
+    PASSWORD_HASHING_EXECUTOR,
+    PASSWORD_HASHING_WORKERS,
+    PASSWORD_HASHING_MAX_QUEUE,
+)
+
+
+def _call_timed(func: Callable[..., Any], *args: Any) -> tuple[Any, float]:
+    started_at = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started_at
+
+
+class PasswordHasher:
+    def __init__(
+        self,
+        max_workers: int,
+        max_queue: int,
+        use_processes: bool = False,
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.use_processes = use_processes
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            executor_class = (
+                ProcessPoolExecutor
+                if self.use_processes
+                else ThreadPoolExecutor
+            )
+            self._executor = executor_class(max_workers=self.max_workers)
+        return self._executor
+
+    async def hash(self, password: str) -> str:
+        return await self.run(utils.get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(
+            utils.verify_password, plain_password, hashed_password
+        )
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        with self._lock:
+            if self.in_flight >= self.capacity:
+                self.rejected += 1
+                raise PasswordHashingUnavailableError
+            self.in_flight += 1
+        try:
+            loop = asyncio.get_running_loop()
+            result, duration = await loop.run_in_executor(
+                self.executor, _call_timed, func, *args
+            )
+        except BaseException:
+            with self._lock:
+                self.in_flight -= 1
+                self.failed += 1
+            raise
+        with self._lock:
+            self.in_flight -= 1
+            self.completed += 1
+        metrics.observe_hashing(func.__name__, duration)
+        return result
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'capacity': self.capacity,
+                'in_flight': self.in_flight,
+                'queued': max(self.in_flight - self.max_workers, 0),
+                'saturation': self.in_flight / self.capacity,
+                'completed': self.completed,
+                'failed': self.failed,
+                'rejected': self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=PASSWORD_HASHING_WORKERS,
+    max_queue=PASSWORD_HASHING_MAX_QUEUE,
+    use_processes=PASSWORD_HASHING_EXECUTOR == 'process',
+)
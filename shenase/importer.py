@@ -0,0 +1,224 @@
+import argparse
+import asyncio
+import codecs
+import csv
+import itertools
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Iterator, Optional, TextIO, Union
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from shenase import schemas, async_crud, enums
+from shenase.database import session_scope
+from shenase.exceptions import PasswordHashingUnavailableError
+from shenase.hashing import password_hasher
+from shenase.config import (
+    IMPORT_BATCH_SIZE,
+    IMPORT_HASHING_MAX_WAIT_SECONDS,
+    IMPORT_MAX_REPORTED_ERRORS,
+)
+
+HASHING_RETRY_DELAY = 0.1
+
+
+@dataclass(slots=True)
+class ImportResult:
+    max_errors: int
+    processed: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: list[dict[str, Any]] = field(default_factory=list)
+
+    def add_error(self, line: int, error: str) -> None:
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'error': error})
+
+
+def get_import_format(filename: Optional[str]) -> enums.ImportFormat:
+    _, extension = os.path.splitext(filename or '')
+    if extension.lower() in ('.ndjson', '.jsonl'):
+        return enums.ImportFormat.NDJSON
+    return enums.ImportFormat.CSV
+
+
+def read_rows(
+    file: TextIO,
+    import_format: enums.ImportFormat,
+) -> Iterator[tuple[int, Any]]:
+    if import_format == enums.ImportFormat.CSV:
+        reader = csv.DictReader(file)
+        for row in reader:
+            yield (
+                reader.line_num,
+                {key: value for key, value in row.items() if value},
+            )
+        return
+
+    for line_number, line in enumerate(file, 1):
+        if line.strip():
+            yield line_number, _parse_json_line(line)
+
+
+async def read_ndjson_stream(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[tuple[int, Any]]:
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ''
+    line_number = 0
+    async for chunk in chunks:
+        *lines, buffer = (buffer + decoder.decode(chunk)).split('\n')
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield line_number, _parse_json_line(line)
+    buffer += decoder.decode(b'', final=True)
+    if buffer.strip():
+        yield line_number + 1, _parse_json_line(buffer)
+
+
+def _parse_json_line(line: str) -> Any:
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError:
+        return None
+
+
+def _format_validation_error(e: ValidationError) -> str:
+    return '; '.join(
+        f'{".".join(map(str, error["loc"])) or "row"}: {error["msg"]}'
+        for error in e.errors()
+    )
+
+
+async def _hash_password(password: str) -> Optional[str]:
+    give_up_at = time.monotonic() + IMPORT_HASHING_MAX_WAIT_SECONDS
+    while True:
+        try:
+            return await password_hasher.hash(password)
+        except PasswordHashingUnavailableError:
+            if time.monotonic() >= give_up_at:
+                return None
+            await asyncio.sleep(HASHING_RETRY_DELAY)
+
+
+async def _import_batch(
+    db: Session | AsyncSession,
+    rows: list[tuple[int, Any]],
+    result: ImportResult,
+) -> None:
+    lines, users = [], []
+    for line, row in rows:
+        result.processed += 1
+        if not isinstance(row, dict):
+            result.add_error(line, 'Row is not a JSON object.')
+            continue
+        try:
+            user = schemas.UserImport.model_validate(row)
+        except ValidationError as e:
+            result.add_error(line, _format_validation_error(e))
+            continue
+        lines.append(line)
+        users.append(user.model_dump(exclude={'avatar'}))
+
+    plain_users = [user for user in users if user['hashed_password'] is None]
+    for i in range(0, len(plain_users), password_hasher.max_workers):
+        chunk = plain_users[i : i + password_hasher.max_workers]
+        hashed_passwords = await asyncio.gather(
+            *(_hash_password(user['password']) for user in chunk)
+        )
+        for user, hashed_password in zip(chunk, hashed_passwords):
+            user['hashed_password'] = hashed_password
+        if None in hashed_passwords:
+            break
+
+    hashed_lines, hashed_users = [], []
+    for line, user in zip(lines, users):
+        if user['hashed_password'] is None:
+            result.add_error(line, 'Password hashing unavailable.')
+        else:
+            hashed_lines.append(line)
+            hashed_users.append(user)
+
+    if hashed_users:
+        errors = await async_crud.import_users(db=db, users=hashed_users)
+        for line, error in zip(hashed_lines, errors):
+            if error is None:
+                result.created += 1
+            else:
+                result.add_error(line, error)
+
+
+async def _read_batch(
+    rows: Union[Iterator[tuple[int, Any]], AsyncIterator[tuple[int, Any]]],
+    batch_size: int,
+) -> list[tuple[int, Any]]:
+    if not isinstance(rows, AsyncIterator):
+        return await run_in_threadpool(
+            list, itertools.islice(rows, batch_size)
+        )
+    batch = []
+    async for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            break
+    return batch
+
+
+async def import_users(
+    db: Session | AsyncSession,
+    rows: Union[Iterator[tuple[int, Any]], AsyncIterator[tuple[int, Any]]],
+    batch_size: int = IMPORT_BATCH_SIZE,
+    max_errors: int = IMPORT_MAX_REPORTED_ERRORS,
+) -> ImportResult:
+    result = ImportResult(max_errors=max_errors)
+    while batch := await _read_batch(rows, batch_size):
+        await _import_batch(db, batch, result)
+    return result
+
+
+async def _main(args: argparse.Namespace) -> ImportResult:
+    with open(args.path, newline='', encoding='utf-8') as f:
+        async with session_scope() as db:
+            return await import_users(
+                db,
+                read_rows(f, args.format or get_import_format(args.path)),
+                batch_size=args.batch_size,
+                max_errors=args.max_errors,
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Import users from a CSV or NDJSON file.'
+    )
+    parser.add_argument('path')
+    parser.add_argument(
+        '--format', type=enums.ImportFormat, choices=list(enums.ImportFormat)
+    )
+    parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+    parser.add_argument(
+        '--max-errors', type=int, default=IMPORT_MAX_REPORTED_ERRORS
+    )
+    args = parser.parse_args()
+
+    try:
+        result = asyncio.run(_main(args))
+    finally:
+        password_hasher.shutdown()
+    print(
+        f'Processed {result.processed} rows: created {result.created}, '
+        f'failed {result.failed}.'
+    )
+    for error in result.errors:
+        print(f'  line {error["line"]}: {error["error"]}')
+
+
+if __name__ == '__main__':
+    main()
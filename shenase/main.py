@@ -1,22 +1,110 @@
+import asyncio
 import os
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
-from shenase.database import Base, engine
-from shenase.routers import auth, users
-from shenase.middlewares import SessionAuthenticationMiddleware
-from shenase.config import AVATAR_UPLOAD_FOLDER, AVATAR_STORAGE_PATH
+from shenase import async_crud
+from shenase.avatars import AvatarStaticFiles, install_default_avatar
+from shenase.database import (
+    engine,
+    read_engine,
+    async_engine,
+    async_read_engine,
+    session_scope,
+)
+from shenase.metrics import metrics
+from shenase.permissions import (
+    DEFAULT_ROLE_PERMISSIONS,
+    reload_permissions,
+    run_permissions_refresher,
+)
+from shenase.hashing import password_hasher
+from shenase.migrations import upgrade_schema
+from shenase.sweeper import run_sweeper
+from shenase.activity import activity_tracker, run_activity_flusher
+from shenase.tokens import run_revocation_refresher
+from shenase.routers import auth, users, roles, metrics as metrics_router
+from shenase.middlewares import (
+    SessionAuthenticationMiddleware,
+    CompressionMiddleware,
+    MetricsMiddleware,
+    QueryStatsMiddleware,
+)
+from shenase.config import (
+    AVATAR_UPLOAD_FOLDER,
+    AVATAR_STORAGE_PATH,
+    AVATAR_STORAGE_BACKEND,
+    SESSION_SWEEP_INTERVAL_SECONDS,
+    ACCESS_TOKEN_MODE,
+    PERMISSIONS_REFRESH_INTERVAL_SECONDS,
+    RESPONSE_COMPRESSION_MIN_SIZE,
+    RESPONSE_COMPRESSION_GZIP_LEVEL,
+    RESPONSE_COMPRESSION_BROTLI_QUALITY,
+    DEBUG_ENABLED,
+    SERVER_TIMING_ENABLED,
+    QUERY_REPEAT_THRESHOLD,
+)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI) -> AsyncGenerator:
     os.makedirs(AVATAR_STORAGE_PATH, exist_ok=True)
-    Base.metadata.create_all(bind=engine)
+    for name, db_engine in (
+        ('primary', engine),
+        ('replica', read_engine),
+        ('async_primary', async_engine),
+        ('async_replica', async_read_engine),
+    ):
+        if db_engine is not None:
+            metrics.instrument_engine(
+                getattr(db_engine, 'sync_engine', db_engine), name
+            )
+    upgrade_schema(engine)
+    async with session_scope() as db:
+        await async_crud.seed_role_permissions(
+            db=db, role_permissions=DEFAULT_ROLE_PERMISSIONS
+        )
+        await reload_permissions(db)
+    install_default_avatar()
+    sweeper_task = (
+        asyncio.create_task(run_sweeper())
+        if SESSION_SWEEP_INTERVAL_SECONDS > 0
+        else None
+    )
+    refresher_task = (
+        asyncio.create_task(run_revocation_refresher())
+        if ACCESS_TOKEN_MODE == 'signed'
+        else None
+    )
+    permissions_task = (
+        asyncio.create_task(run_permissions_refresher())
+        if PERMISSIONS_REFRESH_INTERVAL_SECONDS > 0
+        else None
+    )
+    activity_task = (
+        asyncio.create_task(run_activity_flusher())
+        if activity_tracker.enabled
+        else None
+    )
     yield
+    tasks = [
+        task
+        for task in (
+            sweeper_task,
+            refresher_task,
+            permissions_task,
+            activity_task,
+        )
+        if task is not None
+    ]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    password_hasher.shutdown()
+    metrics.mark_process_dead()
 
 
 app = FastAPI(
@@ -32,15 +120,40 @@ app.add_middleware(
     allow_methods=['*'],
     allow_headers=['*'],
 )
-app.add_middleware(SessionAuthenticationMiddleware)
-
 media_files_path = f'/{AVATAR_UPLOAD_FOLDER}'
 media_files_directory = os.path.dirname(AVATAR_UPLOAD_FOLDER)
-app.mount(
-    media_files_path,
-    StaticFiles(directory=AVATAR_STORAGE_PATH),
-    name=media_files_directory,
+
+app.add_middleware(
+    SessionAuthenticationMiddleware,
+    exclude_paths=(
+        media_files_path,
+        app.docs_url,
+        app.redoc_url,
+        app.openapi_url,
+        '/metrics',
+    ),
+)
+app.add_middleware(
+    QueryStatsMiddleware,
+    server_timing=SERVER_TIMING_ENABLED,
+    repeat_threshold=QUERY_REPEAT_THRESHOLD if DEBUG_ENABLED else 0,
 )
+if RESPONSE_COMPRESSION_MIN_SIZE > 0:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=RESPONSE_COMPRESSION_MIN_SIZE,
+        gzip_level=RESPONSE_COMPRESSION_GZIP_LEVEL,
+        brotli_quality=RESPONSE_COMPRESSION_BROTLI_QUALITY,
+    )
+app.add_middleware(MetricsMiddleware)
+if AVATAR_STORAGE_BACKEND == 'local':
+    app.mount(
+        media_files_path,
+        AvatarStaticFiles(directory=AVATAR_STORAGE_PATH),
+        name=media_files_directory,
+    )
 
 app.include_router(auth.router, tags=['Authentication and Authorization'])
 app.include_router(users.router, tags=['Users'])
+app.include_router(roles.router, tags=['Roles'])
+app.include_router(metrics_router.router)
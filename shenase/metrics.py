@@ -0,0 +1,162 @@
+import os
+from typing import Optional
+
+from sqlalchemy import Engine, Pool, QueuePool, event
+
+from shenase.config import METRICS_ENABLED
+
+try:
+    import prometheus_client
+    from prometheus_client import multiprocess
+except ImportError:
+    prometheus_client = multiprocess = None
+
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+HASHING_BUCKETS = (0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0)
+
+
+def is_multiprocess() -> bool:
+    return 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+
+class Metrics:
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = False
+        self._pools: dict[str, Pool] = {}
+        if enabled:
+            self.enable()
+
+    def enable(self) -> None:
+        if prometheus_client is None:
+            raise RuntimeError(
+                'Metrics require prometheus-client; install the `metrics` '
+                'extra.'
+            )
+        self.registry = prometheus_client.CollectorRegistry(auto_describe=True)
+        self.requests = prometheus_client.Counter(
+            'shenase_http_requests',
+            'HTTP requests by route, method and status code.',
+            ['route', 'method', 'status'],
+            registry=self.registry,
+        )
+        self.request_duration = prometheus_client.Histogram(
+            'shenase_http_request_duration_seconds',
+            'HTTP request latency by route and method.',
+            ['route', 'method'],
+            buckets=LATENCY_BUCKETS,
+            registry=self.registry,
+        )
+        self.exceptions = prometheus_client.Counter(
+            'shenase_http_exceptions',
+            'Unhandled exceptions raised while serving requests.',
+            ['route', 'method', 'exception'],
+            registry=self.registry,
+        )
+        self.pool_checked_out = prometheus_client.Gauge(
+            'shenase_db_pool_checked_out_connections',
+            'Database connections currently checked out of the pool.',
+            ['engine'],
+            multiprocess_mode='livesum',
+            registry=self.registry,
+        )
+        self.pool_overflow = prometheus_client.Gauge(
+            'shenase_db_pool_overflow_connections',
+            'Database connections opened beyond the pool size.',
+            ['engine'],
+            multiprocess_mode='livesum',
+            registry=self.registry,
+        )
+        self.hashing_duration = prometheus_client.Histogram(
+            'shenase_password_hashing_duration_seconds',
+            'Time spent hashing and verifying passwords.',
+            ['operation'],
+            buckets=HASHING_BUCKETS,
+            registry=self.registry,
+        )
+        self.session_validations = prometheus_client.Counter(
+            'shenase_session_validations',
+            'Opaque session token validations by outcome.',
+            ['outcome'],
+            registry=self.registry,
+        )
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def observe_request(
+        self,
+        route: str,
+        method: str,
+        status: int,
+        duration: float,
+    ) -> None:
+        if self.enabled:
+            self.requests.labels(route, method, status).inc()
+            self.request_duration.labels(route, method).observe(duration)
+        self.update_pool_gauges()
+
+    def record_exception(
+        self,
+        route: str,
+        method: str,
+        exception: BaseException,
+    ) -> None:
+        if self.enabled:
+            self.exceptions.labels(
+                route, method, type(exception).__name__
+            ).inc()
+
+    def observe_hashing(self, operation: str, duration: float) -> None:
+        if self.enabled:
+            self.hashing_duration.labels(operation).observe(duration)
+
+    def record_session_validation(self, outcome: str) -> None:
+        if self.enabled:
+            self.session_validations.labels(outcome).inc()
+
+    def instrument_engine(self, engine: Engine, name: str) -> None:
+        if not isinstance(engine.pool, QueuePool) or any(
+            pool is engine.pool for pool in self._pools.values()
+        ):
+            return
+        self._pools[name] = engine.pool
+        event.listen(
+            engine, 'checkout', lambda *args: self.update_pool_gauges()
+        )
+
+    def update_pool_gauges(self) -> None:
+        if not self.enabled:
+            return
+        for name, pool in self._pools.items():
+            self.pool_checked_out.labels(name).set(pool.checkedout())
+            self.pool_overflow.labels(name).set(max(pool.overflow(), 0))
+
+    def generate(self) -> tuple[bytes, str]:
+        registry = self.registry
+        if is_multiprocess():
+            registry = prometheus_client.CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        return (
+            prometheus_client.generate_latest(registry),
+            prometheus_client.CONTENT_TYPE_LATEST,
+        )
+
+    def mark_process_dead(self, pid: Optional[int] = None) -> None:
+        if self.enabled and is_multiprocess():
+            multiprocess.mark_process_dead(pid or os.getpid())
+
+
+metrics = Metrics(METRICS_ENABLED)
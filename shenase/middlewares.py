@@ -1,29 +1,100 @@
-from fastapi import Request, Response, status
+import logging
+import time
+import zlib
+from typing import Optional, Sequence, Union
+
+from fastapi import status
 from fastapi.responses import JSONResponse
-from starlette.middleware.base import (
-    BaseHTTPMiddleware,
-    RequestResponseEndpoint,
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from shenase import schemas, async_crud, tokens, utils
+from shenase.activity import activity_tracker
+from shenase.cache import session_cache
+from shenase.database import session_scope
+from shenase.metrics import metrics
+from shenase.querystats import QueryStats, current_query_stats
+from shenase.revocation import revocation_list
+from shenase.exceptions import CredentialsError
+from shenase.config import REVOCATION_REFRESH_INTERVAL_SECONDS
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+UNCOMPRESSED_CONTENT_TYPES = (
+    'image/',
+    'audio/',
+    'video/',
+    'text/event-stream',
+    'application/gzip',
+    'application/zip',
 )
 
-from shenase import crud, utils
-from shenase.dependencies import get_db
 
+def get_accepted_encodings(accept_encoding: str) -> set[str]:
+    encodings = set()
+    for item in accept_encoding.split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding.strip() and quality > 0:
+            encodings.add(coding.strip().lower())
+    return encodings
 
-class SessionAuthenticationMiddleware(BaseHTTPMiddleware):
-    async def dispatch(
+
+class SessionAuthenticationMiddleware:
+    def __init__(
         self,
-        request: Request,
-        call_next: RequestResponseEndpoint,
-    ) -> Response:
-        access_token = request.cookies.get('access_token')
-        if access_token is not None:
-            db = next(get_db())
-            session = crud.validate_session(
-                db=db,
-                access_token=access_token,
-                client_fingerprint=utils.generate_client_fingerprint(request),
-            )
-            if session is None:
+        app: ASGIApp,
+        exclude_paths: Sequence[str] = (),
+    ) -> None:
+        self.app = app
+        self.exclude_paths = tuple(path.rstrip('/') for path in exclude_paths)
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        connection = HTTPConnection(scope)
+        connection.state.user = None
+        access_token = connection.cookies.get('access_token')
+        if access_token is not None and not self._is_excluded(scope['path']):
+            client_fingerprint = utils.generate_client_fingerprint(connection)
+            if tokens.is_signed_token(access_token):
+                if revocation_list.is_stale(
+                    2 * REVOCATION_REFRESH_INTERVAL_SECONDS
+                ):
+                    error = CredentialsError()
+                    response = JSONResponse(
+                        status_code=error.status_code,
+                        content={'detail': error.detail},
+                        headers=error.headers,
+                    )
+                    await response(scope, receive, send)
+                    return
+                connection.state.user = self._authenticate_signed(
+                    access_token, client_fingerprint
+                )
+            else:
+                connection.state.user = await self._authenticate(
+                    access_token, client_fingerprint
+                )
+
+            if connection.state.user is None:
                 response = JSONResponse(
                     status_code=status.HTTP_404_NOT_FOUND,
                     content={
@@ -31,10 +102,281 @@ class SessionAuthenticationMiddleware(BaseHTTPMiddleware):
                     },
                 )
                 response.delete_cookie(key='access_token')
-                return response
-            request.state.user = crud.get_user_by_id(
-                db=db, user_id=session.user_id
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+    async def _authenticate(
+        self,
+        access_token: str,
+        client_fingerprint: str,
+    ) -> Optional[schemas.User]:
+        user = session_cache.get(access_token, client_fingerprint)
+        if user is not None:
+            activity_tracker.touch(access_token)
+            return user
+
+        async with session_scope() as db:
+            session = await async_crud.validate_session(
+                db=db,
+                access_token=access_token,
+                client_fingerprint=client_fingerprint,
             )
+            if session is None:
+                return None
+            user = schemas.User.model_validate(session.user)
+        session_cache.set(
+            access_token, client_fingerprint, user, session.expires_at
+        )
+        activity_tracker.touch(access_token)
+        return user
+
+    def _authenticate_signed(
+        self,
+        access_token: str,
+        client_fingerprint: str,
+    ) -> Optional[schemas.User]:
+        claims = tokens.decode_access_token(access_token, client_fingerprint)
+        if claims is None or revocation_list.is_revoked(claims):
+            return None
+        return tokens.get_token_user(claims)
+
+    def _is_excluded(self, path: str) -> bool:
+        return any(
+            path == excluded_path or path.startswith(f'{excluded_path}/')
+            for excluded_path in self.exclude_paths
+        )
+
+
+class GZipCompressor:
+    content_encoding = 'gzip'
+
+    def __init__(self, level: int) -> None:
+        self.compressor = zlib.compressobj(
+            level, zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        return self.compressor.compress(body) + self.compressor.flush(
+            zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH
+        )
+
+
+class BrotliCompressor:
+    content_encoding = 'br'
+
+    def __init__(self, quality: int) -> None:
+        self.compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, body: bytes, more_body: bool) -> bytes:
+        compressed = self.compressor.process(body)
+        if more_body:
+            return compressed + self.compressor.flush()
+        return compressed + self.compressor.finish()
+
+
+class CompressionResponder:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int,
+        compressor: Union[GZipCompressor, BrotliCompressor],
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compressor = compressor
+        self.start_message: Optional[Message] = None
+        self.buffer = bytearray()
+        self.started = False
+        self.passthrough = False
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message['type'] == 'http.response.start':
+            headers = Headers(raw=message['headers'])
+            self.start_message = message
+            self.passthrough = 'content-encoding' in headers or headers.get(
+                'content-type', ''
+            ).startswith(UNCOMPRESSED_CONTENT_TYPES)
+            if self.passthrough:
+                await self.send(message)
+            return
+        elif self.passthrough:
+            await self.send(message)
+            return
+        elif message['type'] != 'http.response.body':
+            if not self.started:
+                self.started = True
+                await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        body = message.get('body', b'')
+        more_body = message.get('more_body', False)
+        if self.started:
+            await self.send(
+                {
+                    'type': 'http.response.body',
+                    'body': self.compressor.compress(body, more_body),
+                    'more_body': more_body,
+                }
+            )
+            return
+
+        self.buffer += body
+        if more_body and len(self.buffer) < self.minimum_size:
+            return
+
+        self.started = True
+        headers = MutableHeaders(raw=self.start_message['headers'])
+        headers.add_vary_header('Accept-Encoding')
+        if len(self.buffer) < self.minimum_size:
+            await self.send(self.start_message)
+            await self.send(
+                {'type': 'http.response.body', 'body': bytes(self.buffer)}
+            )
+            return
+
+        body = self.compressor.compress(bytes(self.buffer), more_body)
+        headers['Content-Encoding'] = self.compressor.content_encoding
+        del headers['Content-Length']
+        if not more_body:
+            headers['Content-Length'] = str(len(body))
+        await self.send(self.start_message)
+        await self.send(
+            {
+                'type': 'http.response.body',
+                'body': body,
+                'more_body': more_body,
+            }
+        )
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        encodings = get_accepted_encodings(
+            Headers(scope=scope).get('accept-encoding', '')
+        )
+        if brotli is not None and 'br' in encodings:
+            compressor = BrotliCompressor(self.brotli_quality)
+        elif 'gzip' in encodings:
+            compressor = GZipCompressor(self.gzip_level)
         else:
-            request.state.user = None
-        return await call_next(request)
+            await self.app(scope, receive, send)
+            return
+        await CompressionResponder(self.app, self.minimum_size, compressor)(
+            scope, receive, send
+        )
+
+
+def _get_route_name(scope: Scope) -> str:
+    return getattr(scope.get('route'), 'name', None) or 'unmatched'
+
+
+class MetricsMiddleware:
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope['type'] != 'http' or not metrics.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        started_at = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        except Exception as e:
+            metrics.record_exception(
+                _get_route_name(scope), scope['method'], e
+            )
+            raise
+        finally:
+            metrics.observe_request(
+                _get_route_name(scope),
+                scope['method'],
+                status_code,
+                time.perf_counter() - started_at,
+            )
+
+
+class QueryStatsMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        server_timing: bool = False,
+        repeat_threshold: int = 0,
+    ) -> None:
+        self.app = app
+        self.server_timing = server_timing
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(
+            name=f'{scope["method"]} {scope["path"]}',
+            track_statements=self.repeat_threshold > 0,
+        )
+        started_at = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if self.server_timing and message['type'] == 'http.response.start':
+                MutableHeaders(scope=message).append(
+                    'Server-Timing',
+                    f'db;dur={stats.duration * 1000:.1f};'
+                    f'desc="{stats.count} queries", '
+                    f'app;dur={(time.perf_counter() - started_at) * 1000:.1f}',
+                )
+            await send(message)
+
+        token = current_query_stats.set(stats)
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_query_stats.reset(token)
+            for statement, count in stats.get_repeated_statements(
+                self.repeat_threshold
+            ):
+                logger.warning(
+                    'Statement ran %d times in %s, possible N+1 query: %s',
+                    count,
+                    stats.name,
+                    statement,
+                )
@@ -0,0 +1,78 @@
+import logging
+
+from sqlalchemy import Engine, inspect, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from shenase import models  # noqa: F401
+from shenase.database import Base, engine
+
+logger = logging.getLogger(__name__)
+
+
+def add_missing_columns(bind: Engine) -> list[str]:
+    inspector = inspect(bind)
+    added_columns = []
+    for table in Base.metadata.sorted_tables:
+        existing_columns = {
+            column['name'] for column in inspector.get_columns(table.name)
+        }
+        for column in table.columns:
+            if column.name in existing_columns:
+                continue
+            elif not column.nullable or column.server_default is not None:
+                logger.warning(
+                    'Column `%s` on `%s` must be added by hand.',
+                    column.name,
+                    table.name,
+                )
+                continue
+            column_type = column.type.compile(dialect=bind.dialect)
+            with bind.begin() as connection:
+                connection.execute(
+                    text(
+                        f'ALTER TABLE {table.name} '
+                        f'ADD COLUMN {column.name} {column_type}'
+                    )
+                )
+            logger.info('Added column `%s` to `%s`.', column.name, table.name)
+            added_columns.append(f'{table.name}.{column.name}')
+    return added_columns
+
+
+def upgrade_schema(bind: Engine) -> list[str]:
+    Base.metadata.create_all(bind=bind)
+    upgrades = add_missing_columns(bind)
+
+    inspector = inspect(bind)
+    for table in Base.metadata.sorted_tables:
+        existing_indexes = {
+            index['name'] for index in inspector.get_indexes(table.name)
+        }
+        for index in table.indexes:
+            if index.name in existing_indexes:
+                continue
+            try:
+                index.create(bind=bind)
+            except SQLAlchemyError:
+                logger.exception(
+                    'Could not create index `%s` on `%s`.',
+                    index.name,
+                    table.name,
+                )
+            else:
+                logger.info(
+                    'Created index `%s` on `%s`.', index.name, table.name
+                )
+                upgrades.append(index.name)
+    return upgrades
+
+
+def main() -> None:
+    upgrades = upgrade_schema(engine)
+    print(f'Applied {len(upgrades)} missing columns and indexes.')
+    for name in upgrades:
+        print(f'  {name}')
+
+
+if __name__ == '__main__':
+    main()
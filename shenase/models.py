@@ -9,6 +9,8 @@ from sqlalchemy import (
     String,
     Enum,
     DateTime,
+    Index,
+    UniqueConstraint,
 )
 from sqlalchemy.orm import relationship
 
@@ -28,8 +30,14 @@ class User(Base):
     is_verified = Column(Boolean, default=False)
     status = Column(Enum(enums.UserStatus), default=enums.UserStatus.ACTIVE)
     created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    tokens_valid_after = Column(DateTime, index=True)
 
-    profile = relationship('Profile', back_populates='user', uselist=False)
+    profile = relationship(
+        'Profile',
+        back_populates='user',
+        uselist=False,
+        lazy='selectin',
+    )
     sessions = relationship('Session', back_populates='user')
 
 
@@ -38,16 +46,27 @@ class Profile(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     display_name = Column(String(50), nullable=False)
-    avatar = Column(String(35), default=DEFAULT_AVATAR)
+    avatar = Column(String(35), default=DEFAULT_AVATAR, index=True)
     bio = Column(String(300))
     location = Column(String(200))
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    version = Column(Integer, default=1)
+    updated_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    user_id = Column(
+        Integer,
+        ForeignKey('users.id'),
+        unique=True,
+        index=True,
+        nullable=False,
+    )
 
     user = relationship('User', back_populates='profile')
 
 
 class Session(Base):
     __tablename__ = 'sessions'
+    __table_args__ = (
+        Index('ix_sessions_status_expires_at', 'status', 'expires_at'),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     access_token = Column(
@@ -61,12 +80,29 @@ class Session(Base):
         Enum(enums.SessionStatus),
         default=enums.SessionStatus.ACTIVE,
     )
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
     expires_at = Column(
         DateTime,
         default=lambda: (
             datetime.now(timezone.utc) + timedelta(days=SESSION_EXPIRE_DAYS)
         ),
     )
-    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    last_seen_at = Column(DateTime)
+    revoked_at = Column(DateTime, index=True)
+    user_id = Column(
+        Integer,
+        ForeignKey('users.id'),
+        index=True,
+        nullable=False,
+    )
 
     user = relationship('User', back_populates='sessions')
+
+
+class RolePermission(Base):
+    __tablename__ = 'role_permissions'
+    __table_args__ = (UniqueConstraint('role', 'permission'),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    role = Column(Enum(enums.UserRole), nullable=False)
+    permission = Column(String(50), nullable=False)
@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from functools import reduce
+from operator import or_
+from typing import Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from shenase import async_crud, enums
+from shenase.database import session_scope
+from shenase.config import PERMISSIONS_REFRESH_INTERVAL_SECONDS
+
+DEFAULT_ROLE_PERMISSIONS = {
+    enums.UserRole.ADMIN: [permission.name for permission in enums.Permission],
+    enums.UserRole.MODERATOR: [enums.Permission.CHANGE_USER_STATUS.name],
+    enums.UserRole.USER: [],
+}
+
+logger = logging.getLogger(__name__)
+
+
+class PermissionTable:
+    def __init__(self) -> None:
+        self._masks: dict[enums.UserRole, enums.Permission] = {}
+
+    def load(self, role_permissions: Iterable[tuple[str, str]]) -> None:
+        masks = {role: enums.Permission(0) for role in enums.UserRole}
+        for role, permission in role_permissions:
+            try:
+                masks[enums.UserRole(role)] |= enums.Permission[permission]
+            except (KeyError, ValueError):
+                logger.warning(
+                    'Ignoring unknown permission `%s` for role `%s`.',
+                    permission,
+                    role,
+                )
+        self._masks = masks
+
+    def get(self, role: enums.UserRole) -> enums.Permission:
+        return self._masks.get(role, enums.Permission(0))
+
+    def has(self, role: enums.UserRole, required: enums.Permission) -> bool:
+        return self.get(role) & required == required
+
+
+def combine(permissions: Iterable[enums.Permission]) -> enums.Permission:
+    return reduce(or_, permissions, enums.Permission(0))
+
+
+def get_default_role_permissions() -> list[tuple[str, str]]:
+    return [
+        (role, permission)
+        for role, permissions in DEFAULT_ROLE_PERMISSIONS.items()
+        for permission in permissions
+    ]
+
+
+async def reload_permissions(db: Session | AsyncSession) -> None:
+    permission_table.load(await async_crud.get_role_permissions(db=db))
+
+
+async def run_permissions_refresher(
+    interval: float = PERMISSIONS_REFRESH_INTERVAL_SECONDS,
+) -> None:
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_scope(read_only=True) as db:
+                await reload_permissions(db)
+        except Exception:
+            logger.exception('Permissions refresh failed.')
+
+
+permission_table = PermissionTable()
+permission_table.load(get_default_role_permissions())
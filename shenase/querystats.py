@@ -0,0 +1,83 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from sqlalchemy import Engine, event
+
+from shenase.config import SLOW_QUERY_THRESHOLD_MS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class QueryStats:
+    name: str
+    track_statements: bool = False
+    count: int = 0
+    duration: float = 0.0
+    statements: Counter[str] = field(default_factory=Counter)
+
+    def record(self, statement: str, duration: float) -> None:
+        self.count += 1
+        self.duration += duration
+        if self.track_statements:
+            self.statements[statement] += 1
+
+    def get_repeated_statements(self, threshold: int) -> list[tuple[str, int]]:
+        return [
+            (statement, count)
+            for statement, count in self.statements.most_common()
+            if count >= threshold
+        ]
+
+
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar(
+    'current_query_stats', default=None
+)
+
+
+def _before_cursor_execute(
+    connection: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    connection.info['query_started_at'] = time.perf_counter()
+
+
+def _after_cursor_execute(
+    connection: Any,
+    cursor: Any,
+    statement: str,
+    parameters: Any,
+    context: Any,
+    executemany: bool,
+) -> None:
+    started_at = connection.info.pop('query_started_at', None)
+    if started_at is None:
+        return
+    duration = time.perf_counter() - started_at
+    stats = current_query_stats.get()
+    if stats is not None:
+        stats.record(statement, duration)
+    if SLOW_QUERY_THRESHOLD_MS > 0 and duration * 1000 >= (
+        SLOW_QUERY_THRESHOLD_MS
+    ):
+        logger.warning(
+            'Slow query (%.1f ms) in %s: %s',
+            duration * 1000,
+            stats.name if stats is not None else 'background task',
+            statement,
+        )
+
+
+def instrument_engine(engine: Engine) -> None:
+    if event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        return
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
@@ -0,0 +1,163 @@
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Optional
+
+from shenase.exceptions import TooManyLoginAttemptsError
+from shenase.config import (
+    LOGIN_RATE_LIMIT_BACKEND,
+    LOGIN_RATE_LIMIT_REDIS_URL,
+    LOGIN_USERNAME_BURST,
+    LOGIN_USERNAME_RATE_PER_MINUTE,
+    LOGIN_CLIENT_BURST,
+    LOGIN_CLIENT_RATE_PER_MINUTE,
+)
+
+try:
+    from redis import asyncio as aioredis
+except ImportError:
+    aioredis = None
+
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(bucket[1]) or capacity
+local updated_at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + (now - updated_at) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'updated_at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(retry_after)
+"""
+
+
+class RateLimitBackend(ABC):
+    @abstractmethod
+    async def acquire(self, key: str, capacity: int, rate: float) -> float: ...
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    def __init__(
+        self,
+        max_keys: int = 100000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_keys = max_keys
+        self.clock = clock
+        self._tables: dict[str, dict[str, tuple[float, float, float]]] = {}
+        self._next_refill_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    async def acquire(self, key: str, capacity: int, rate: float) -> float:
+        now = self.clock()
+        scope = key.partition(':')[0]
+        with self._lock:
+            buckets = self._tables.setdefault(scope, {})
+            if key not in buckets and len(buckets) >= self.max_keys:
+                buckets = self._prune(scope, now)
+                if len(buckets) >= self.max_keys:
+                    return 0.0
+            tokens, updated_at, _ = buckets.get(key, (capacity, now, now))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            retry_after = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                retry_after = (1 - tokens) / rate
+            refill_at = now + (capacity - tokens) / rate
+            buckets[key] = (tokens, now, refill_at)
+            self._next_refill_at[scope] = min(
+                self._next_refill_at.get(scope, refill_at), refill_at
+            )
+        return retry_after
+
+    def _prune(
+        self, scope: str, now: float
+    ) -> dict[str, tuple[float, float, float]]:
+        if now < self._next_refill_at.get(scope, now):
+            return self._tables[scope]
+        buckets = self._tables[scope] = {
+            key: bucket
+            for key, bucket in self._tables[scope].items()
+            if bucket[2] > now
+        }
+        self._next_refill_at[scope] = min(
+            (bucket[2] for bucket in buckets.values()), default=now
+        )
+        return buckets
+
+    def clear(self) -> None:
+        with self._lock:
+            self._tables.clear()
+            self._next_refill_at.clear()
+
+
+class RedisRateLimitBackend(RateLimitBackend):
+    def __init__(self, url: str, prefix: str = 'shenase:ratelimit:') -> None:
+        if aioredis is None:
+            raise RuntimeError(
+                'Redis rate limiting requires redis; install the `redis` '
+                'extra.'
+            )
+        self.prefix = prefix
+        self.client = aioredis.from_url(url)
+        self.script = self.client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def acquire(self, key: str, capacity: int, rate: float) -> float:
+        return float(
+            await self.script(keys=[self.prefix + key], args=[capacity, rate])
+        )
+
+
+class LoginRateLimiter:
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        username_burst: int,
+        username_rate_per_minute: float,
+        client_burst: int,
+        client_rate_per_minute: float,
+    ) -> None:
+        self.backend = backend
+        self.limits = {
+            'username': (username_burst, username_rate_per_minute / 60),
+            'client': (client_burst, client_rate_per_minute / 60),
+        }
+
+    async def check(self, username: str, client_key: Optional[str]) -> None:
+        for scope, key in (
+            ('client', client_key),
+            ('username', username.lower()),
+        ):
+            capacity, rate = self.limits[scope]
+            if key is None or capacity <= 0 or rate <= 0:
+                continue
+            retry_after = await self.backend.acquire(
+                f'{scope}:{key}', capacity, rate
+            )
+            if retry_after > 0:
+                raise TooManyLoginAttemptsError(math.ceil(retry_after))
+
+
+def create_backend() -> RateLimitBackend:
+    if LOGIN_RATE_LIMIT_BACKEND == 'redis':
+        return RedisRateLimitBackend(LOGIN_RATE_LIMIT_REDIS_URL)
+    return MemoryRateLimitBackend()
+
+
+login_rate_limiter = LoginRateLimiter(
+    backend=create_backend(),
+    username_burst=LOGIN_USERNAME_BURST,
+    username_rate_per_minute=LOGIN_USERNAME_RATE_PER_MINUTE,
+    client_burst=LOGIN_CLIENT_BURST,
+    client_rate_per_minute=LOGIN_CLIENT_RATE_PER_MINUTE,
+)
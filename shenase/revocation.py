@@ -0,0 +1,87 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from shenase.config import SESSION_EXPIRE_DAYS
+
+
+def _to_timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RevocationList:
+    def __init__(self, max_token_age: timedelta) -> None:
+        self.max_token_age = max_token_age
+        self.watermark: Optional[datetime] = None
+        self._sessions: dict[int, float] = {}
+        self._users: dict[int, float] = {}
+        self._refreshed_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def is_stale(self, max_age: float) -> bool:
+        return (
+            self._refreshed_at is None
+            or time.monotonic() - self._refreshed_at > max_age
+        )
+
+    def is_revoked(self, claims: dict[str, Any]) -> bool:
+        if claims['sid'] in self._sessions:
+            return True
+        return claims['iat'] < self._users.get(claims['uid'], 0)
+
+    def revoke_session(self, session_id: int, expires_at: datetime) -> None:
+        with self._lock:
+            self._sessions[session_id] = _to_timestamp(expires_at)
+
+    def revoke_user(self, user_id: int, valid_after: datetime) -> None:
+        timestamp = _to_timestamp(valid_after)
+        with self._lock:
+            if timestamp > self._users.get(user_id, 0):
+                self._users[user_id] = timestamp
+
+    def update(
+        self,
+        sessions: list[tuple[int, datetime]],
+        users: list[tuple[int, datetime]],
+        watermark: datetime,
+    ) -> None:
+        for session_id, expires_at in sessions:
+            self.revoke_session(session_id, expires_at)
+        for user_id, valid_after in users:
+            self.revoke_user(user_id, valid_after)
+
+        now = time.time()
+        oldest = now - self.max_token_age.total_seconds()
+        with self._lock:
+            self._sessions = {
+                session_id: expires_at
+                for session_id, expires_at in self._sessions.items()
+                if expires_at > now
+            }
+            self._users = {
+                user_id: valid_after
+                for user_id, valid_after in self._users.items()
+                if valid_after > oldest
+            }
+            self.watermark = watermark
+            self._refreshed_at = time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            self._users.clear()
+            self.watermark = None
+            self._refreshed_at = None
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                'sessions': len(self._sessions),
+                'users': len(self._users),
+            }
+
+
+revocation_list = RevocationList(
+    max_token_age=timedelta(days=SESSION_EXPIRE_DAYS)
+)
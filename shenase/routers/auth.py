@@ -1,39 +1,76 @@
+from typing import Optional
+
 from fastapi import APIRouter, Depends, Request, Response, Body
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from shenase import schemas, crud, utils
-from shenase.dependencies import get_db, get_access_token
+from shenase import schemas, async_crud, tokens, utils
+from shenase.hashing import password_hasher
+from shenase.ratelimit import login_rate_limiter
+from shenase.dependencies import (
+    get_db,
+    get_read_db,
+    get_access_token,
+    get_current_user,
+)
 from shenase.exceptions import (
     IncorrectUsernameOrPasswordError,
     CredentialsError,
 )
-from shenase.config import DEBUG_ENABLED
+from shenase.config import (
+    DEBUG_ENABLED,
+    ACCESS_TOKEN_MODE,
+    MAX_ACTIVE_SESSIONS_PER_USER,
+)
 
 router = APIRouter()
 
 
+async def _get_session_id(
+    db: Session | AsyncSession,
+    access_token: str,
+) -> Optional[int]:
+    if tokens.is_signed_token(access_token):
+        claims = tokens.decode_access_token(access_token)
+        return claims['sid'] if claims is not None else None
+    session = await async_crud.get_session_by_access_token(
+        db=db, access_token=access_token
+    )
+    return session.id if session is not None else None
+
+
 @router.post('/login/', response_model=schemas.User)
 async def login(
     request: Request,
     response: Response,
     username: str = Body(...),
     password: str = Body(...),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_db),
 ):
-    user = crud.get_user_by_username(db=db, username=username)
-    if user is None or not utils.verify_password(
+    client_fingerprint = utils.generate_client_fingerprint(request)
+    await login_rate_limiter.check(
+        username,
+        request.client.host if request.client else client_fingerprint,
+    )
+    user = await async_crud.get_user_by_username(db=db, username=username)
+    if user is None or not await password_hasher.verify(
         password, user.hashed_password
     ):
         raise IncorrectUsernameOrPasswordError
 
-    session = crud.create_session(
+    session = await async_crud.create_session(
         db=db,
         user_id=user.id,
-        client_fingerprint=utils.generate_client_fingerprint(request),
+        client_fingerprint=client_fingerprint,
+        max_active_sessions=MAX_ACTIVE_SESSIONS_PER_USER,
     )
     response.set_cookie(
         key='access_token',
-        value=session.access_token,
+        value=(
+            tokens.create_access_token(session, user)
+            if ACCESS_TOKEN_MODE == 'signed'
+            else session.access_token
+        ),
         httponly=True,
         secure=False if DEBUG_ENABLED else True,
         samesite='lax',
@@ -45,15 +82,73 @@ async def login(
 async def logout(
     response: Response,
     access_token: str = Depends(get_access_token),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_db),
 ):
-    crud.deactivate_session(db=db, access_token=access_token)
+    claims = (
+        tokens.decode_access_token(access_token)
+        if tokens.is_signed_token(access_token)
+        else None
+    )
+    if claims is not None:
+        await async_crud.deactivate_session_by_id(
+            db=db, session_id=claims['sid']
+        )
+    else:
+        await async_crud.deactivate_session(db=db, access_token=access_token)
     response.delete_cookie(key='access_token')
     return {'message': 'Successfully logged out.'}
 
 
 @router.get('/users/me/', response_model=schemas.User)
-async def read_users_me(request: Request):
+async def read_users_me(
+    request: Request,
+    db: Session | AsyncSession = Depends(get_read_db),
+):
     if request.state.user is None:
         raise CredentialsError
+    elif request.state.user.profile is None:
+        user = await async_crud.get_user_by_id(
+            db=db, user_id=request.state.user.id
+        )
+        if user is None:
+            raise CredentialsError
+        return user
     return request.state.user
+
+
+@router.get('/users/me/sessions/', response_model=list[schemas.SessionInfo])
+async def read_user_sessions(
+    access_token: str = Depends(get_access_token),
+    db: Session | AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
+):
+    session_id = await _get_session_id(db, access_token)
+    sessions = await async_crud.get_user_sessions(
+        db=db, user_id=current_user.id
+    )
+    return [
+        schemas.SessionInfo.model_validate(session).model_copy(
+            update={'current': session.id == session_id}
+        )
+        for session in sessions
+    ]
+
+
+@router.delete('/users/me/sessions/')
+async def revoke_user_sessions(
+    response: Response,
+    keep_current: bool = True,
+    access_token: str = Depends(get_access_token),
+    db: Session | AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_user),
+):
+    revoked = await async_crud.deactivate_user_sessions(
+        db=db,
+        user_id=current_user.id,
+        except_session_id=(
+            await _get_session_id(db, access_token) if keep_current else None
+        ),
+    )
+    if not keep_current:
+        response.delete_cookie(key='access_token')
+    return {'revoked': revoked}
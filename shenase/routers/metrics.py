@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Response
+from fastapi.concurrency import run_in_threadpool
+
+from shenase.metrics import metrics
+from shenase.exceptions import MetricsDisabledError
+
+router = APIRouter()
+
+
+@router.get('/metrics', include_in_schema=False)
+async def read_metrics():
+    if not metrics.enabled:
+        raise MetricsDisabledError
+    content, media_type = await run_in_threadpool(metrics.generate)
+    return Response(content=content, media_type=media_type)
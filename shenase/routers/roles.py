@@ -0,0 +1,54 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from shenase import schemas, async_crud, enums
+from shenase.permissions import permission_table, reload_permissions
+from shenase.dependencies import get_db, permission_required
+from shenase.exceptions import RoleManagementLockoutError
+
+router = APIRouter()
+
+
+@router.get('/roles/', response_model=list[schemas.RolePermissions])
+async def read_roles(
+    current_user: schemas.User = Depends(
+        permission_required(enums.Permission.MANAGE_ROLES)
+    ),
+):
+    return [
+        {
+            'role': role,
+            'permissions': [
+                permission.name
+                for permission in enums.Permission
+                if permission in permission_table.get(role)
+            ],
+        }
+        for role in enums.UserRole
+    ]
+
+
+@router.put(
+    '/roles/{role}/permissions/',
+    response_model=schemas.RolePermissions,
+)
+async def update_role_permissions(
+    role: enums.UserRole,
+    role_permissions: schemas.RolePermissionsUpdate,
+    db: Session | AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(
+        permission_required(enums.Permission.MANAGE_ROLES)
+    ),
+):
+    if (
+        role == current_user.role
+        and enums.Permission.MANAGE_ROLES.name
+        not in role_permissions.permissions
+    ):
+        raise RoleManagementLockoutError
+    await async_crud.set_role_permissions(
+        db=db, role=role, permissions=role_permissions.permissions
+    )
+    await reload_permissions(db)
+    return {'role': role, 'permissions': role_permissions.permissions}
@@ -1,42 +1,218 @@
-from typing import Optional
+import io
+from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, Body, UploadFile, File
+from fastapi import (
+    APIRouter,
+    Depends,
+    Request,
+    Response,
+    Body,
+    Query,
+    UploadFile,
+    File,
+    status,
+)
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from shenase import schemas, crud, enums
-from shenase.dependencies import get_db, get_current_active_user
-from shenase.decorators import role_required
+from shenase import schemas, async_crud, avatars, importer, enums, utils
+from shenase.hashing import password_hasher
+from shenase.serialization import ResponseSerializer, SerializedJSONResponse
+from shenase.dependencies import (
+    get_db,
+    get_read_db,
+    get_current_active_user,
+    permission_required,
+)
 from shenase.exceptions import (
     UserNotFoundError,
     UserCreationError,
     UserUpdateError,
+    UnsupportedImportFormatError,
+)
+from shenase.config import (
+    PAGE_SIZE_DEFAULT,
+    PAGE_SIZE_MAX,
+    BULK_UPDATE_BATCH_SIZE,
+    FAST_JSON_RESPONSES_ENABLED,
+    PROFILE_CACHE_CONTROL,
 )
 
 router = APIRouter()
 
+user_page_serializer = ResponseSerializer(schemas.Page[schemas.User])
+profile_page_serializer = ResponseSerializer(schemas.Page[schemas.Profile])
+
+
+def _make_page(items: list, limit: int, order: enums.SortOrder) -> dict:
+    next_cursor = (
+        utils.encode_cursor(items[limit - 1].id, order)
+        if len(items) > limit
+        else None
+    )
+    return {'items': items[:limit], 'next_cursor': next_cursor}
+
+
+def _make_page_response(
+    page: dict,
+    serializer: ResponseSerializer,
+    headers: Optional[dict[str, str]] = None,
+) -> dict | SerializedJSONResponse:
+    if FAST_JSON_RESPONSES_ENABLED:
+        return SerializedJSONResponse(page, serializer, headers=headers)
+    return page
+
+
+def _make_cache_headers(profiles: list, *key: Any) -> dict[str, str]:
+    headers = {
+        'ETag': utils.make_etag(
+            *key, *((profile.id, profile.version) for profile in profiles)
+        ),
+        'Cache-Control': PROFILE_CACHE_CONTROL,
+    }
+    updated_at = [profile.updated_at for profile in profiles]
+    if updated_at and None not in updated_at:
+        headers['Last-Modified'] = utils.format_http_date(max(updated_at))
+    return headers
+
+
+def _is_conditional(request: Request) -> bool:
+    return (
+        'if-none-match' in request.headers
+        or 'if-modified-since' in request.headers
+    )
+
+
+def _is_not_modified(request: Request, headers: dict[str, str]) -> bool:
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return utils.etag_matches(if_none_match, headers['ETag'])
+    if_modified_since = utils.parse_http_date(
+        request.headers.get('if-modified-since', '')
+    )
+    last_modified = headers.get('Last-Modified')
+    return (
+        if_modified_since is not None
+        and last_modified is not None
+        and utils.parse_http_date(last_modified) <= if_modified_since
+    )
+
+
+def _make_not_modified_response(headers: dict[str, str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+def _make_bulk_result(
+    selection: schemas.BulkUserSelection,
+    updated_users: list[tuple[int, str]],
+) -> dict:
+    updated_ids = {user_id: user_id for user_id, _ in updated_users}
+    updated_usernames = {
+        username: user_id for user_id, username in updated_users
+    }
+    items = [
+        {
+            'key': key,
+            'user_id': updated.get(key),
+            'updated': key in updated,
+        }
+        for keys, updated in (
+            (selection.usernames, updated_usernames),
+            (selection.ids, updated_ids),
+        )
+        for key in dict.fromkeys(keys)
+    ]
+    updated_count = sum(item['updated'] for item in items)
+    return {
+        'updated': updated_count,
+        'not_found': len(items) - updated_count,
+        'items': items,
+    }
 
-@router.get('/users/', response_model=list[schemas.User])
-@role_required([enums.UserRole.ADMIN])
+
+@router.get('/users/', response_model=schemas.Page[schemas.User])
 async def read_users(
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_active_user),
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    order: enums.SortOrder = enums.SortOrder.ASC,
+    role: Optional[enums.UserRole] = None,
+    status: Optional[enums.UserStatus] = None,
+    is_verified: Optional[bool] = None,
+    db: Session | AsyncSession = Depends(get_read_db),
+    current_user: schemas.User = Depends(
+        permission_required(enums.Permission.READ_USERS)
+    ),
 ):
-    return crud.get_users(db=db)
+    users = await async_crud.get_users(
+        db=db,
+        limit=limit + 1,
+        after_id=utils.decode_cursor(cursor, order),
+        order=order,
+        role=role,
+        status=status,
+        is_verified=is_verified,
+    )
+    return _make_page_response(
+        _make_page(users, limit, order), user_page_serializer
+    )
 
 
-@router.get('/profiles/', response_model=list[schemas.Profile])
-async def read_profiles(db: Session = Depends(get_db)):
-    return crud.get_profiles(db=db)
+@router.get('/profiles/', response_model=schemas.Page[schemas.Profile])
+async def read_profiles(
+    request: Request,
+    response: Response,
+    limit: int = Query(PAGE_SIZE_DEFAULT, ge=1, le=PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    order: enums.SortOrder = enums.SortOrder.ASC,
+    db: Session | AsyncSession = Depends(get_read_db),
+):
+    after_id = utils.decode_cursor(cursor, order)
+    if _is_conditional(request):
+        versions = await async_crud.get_profile_versions(
+            db=db, limit=limit + 1, after_id=after_id, order=order
+        )
+        headers = _make_cache_headers(
+            versions[:limit], order, len(versions) > limit
+        )
+        if _is_not_modified(request, headers):
+            return _make_not_modified_response(headers)
+
+    profiles = await async_crud.get_profiles(
+        db=db, limit=limit + 1, after_id=after_id, order=order
+    )
+    headers = _make_cache_headers(
+        profiles[:limit], order, len(profiles) > limit
+    )
+    response.headers.update(headers)
+    return _make_page_response(
+        _make_page(profiles, limit, order), profile_page_serializer, headers
+    )
 
 
 @router.get('/users/{username}/profile/', response_model=schemas.Profile)
 async def read_user_profile(
     username: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: Session | AsyncSession = Depends(get_read_db),
 ):
-    profile = crud.get_profile_by_username(db=db, username=username)
+    if _is_conditional(request):
+        version = await async_crud.get_profile_version_by_username(
+            db=db, username=username
+        )
+        if version is None:
+            raise UserNotFoundError(username)
+        headers = _make_cache_headers([version])
+        if _is_not_modified(request, headers):
+            return _make_not_modified_response(headers)
+
+    profile = await async_crud.get_profile_by_username(
+        db=db, username=username
+    )
     if profile is None:
         raise UserNotFoundError(username)
+    response.headers.update(_make_cache_headers([profile]))
     return profile
 
 
@@ -49,7 +225,7 @@ async def create_user(
     bio: Optional[str] = Body(None),
     location: Optional[str] = Body(None),
     avatar: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_db),
 ):
     try:
         new_user = schemas.UserCreate(
@@ -63,7 +239,38 @@ async def create_user(
         )
     except ValueError as e:
         raise UserCreationError from e
-    return crud.create_user(db=db, user=new_user)
+    return await async_crud.create_user(
+        db=db,
+        user=new_user,
+        hashed_password=await password_hasher.hash(new_user.password),
+        avatar=(
+            await avatars.save_avatar(new_user.avatar)
+            if new_user.avatar is not None
+            else None
+        ),
+    )
+
+
+@router.post('/users/import/', response_model=schemas.UserImportResult)
+async def import_users(
+    request: Request,
+    file: Optional[UploadFile] = File(None),
+    format: Optional[enums.ImportFormat] = None,
+    db: Session | AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(
+        permission_required(enums.Permission.IMPORT_USERS)
+    ),
+):
+    if file is None:
+        if format not in (None, enums.ImportFormat.NDJSON):
+            raise UnsupportedImportFormatError
+        rows = importer.read_ndjson_stream(request.stream())
+    else:
+        rows = importer.read_rows(
+            io.TextIOWrapper(file.file, encoding='utf-8', newline=''),
+            format or importer.get_import_format(file.filename),
+        )
+    return await importer.import_users(db=db, rows=rows)
 
 
 @router.patch('/users/me/', response_model=schemas.User)
@@ -75,7 +282,7 @@ async def update_user(
     bio: Optional[str] = Body(None),
     location: Optional[str] = Body(None),
     avatar: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db),
+    db: Session | AsyncSession = Depends(get_db),
     current_user: schemas.User = Depends(get_current_active_user),
 ):
     try:
@@ -90,28 +297,121 @@ async def update_user(
         )
     except ValueError as e:
         raise UserUpdateError from e
-    return crud.update_user(db=db, user=user_data, current_user=current_user)
+    return await async_crud.update_user(
+        db=db,
+        user=user_data,
+        current_user=current_user,
+        hashed_password=(
+            await password_hasher.hash(user_data.password)
+            if user_data.password is not None
+            else None
+        ),
+        avatar=(
+            await avatars.save_avatar(user_data.avatar)
+            if user_data.avatar is not None
+            else None
+        ),
+    )
+
+
+@router.post('/users/me/avatar/uploads/', response_model=schemas.AvatarUpload)
+async def create_avatar_upload(
+    filename: Optional[str] = Body(None, embed=True),
+    current_user: schemas.User = Depends(get_current_active_user),
+):
+    return await run_in_threadpool(
+        avatars.create_upload, current_user.id, filename
+    )
+
+
+@router.put(
+    '/avatars/uploads/{key}',
+    status_code=status.HTTP_204_NO_CONTENT,
+    response_class=Response,
+)
+async def receive_avatar_upload(
+    key: str,
+    expires: int,
+    signature: str,
+    request: Request,
+):
+    await avatars.receive_upload(key, expires, signature, request.stream())
+
+
+@router.put('/users/me/avatar/', response_model=schemas.User)
+async def record_avatar_upload(
+    key: str = Body(...),
+    token: str = Body(...),
+    db: Session | AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user),
+):
+    return await async_crud.update_user(
+        db=db,
+        user=schemas.UserProfileUpdate(),
+        current_user=current_user,
+        avatar=await avatars.record_upload(current_user.id, key, token),
+    )
 
 
 @router.patch('/users/{username}/role/', response_model=schemas.User)
-@role_required([enums.UserRole.ADMIN])
 async def change_user_role(
     username: str,
     new_role: enums.UserRole,
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_active_user),
+    db: Session | AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(
+        permission_required(enums.Permission.CHANGE_USER_ROLE)
+    ),
 ):
-    return crud.update_user_role(db=db, username=username, new_role=new_role)
+    return await async_crud.update_user_role(
+        db=db, username=username, new_role=new_role
+    )
 
 
 @router.patch('/users/{username}/status/', response_model=schemas.User)
-@role_required([enums.UserRole.ADMIN, enums.UserRole.MODERATOR])
 async def change_user_status(
     username: str,
     new_status: enums.UserStatus,
-    db: Session = Depends(get_db),
-    current_user: schemas.User = Depends(get_current_active_user),
+    db: Session | AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(
+        permission_required(enums.Permission.CHANGE_USER_STATUS)
+    ),
 ):
-    return crud.update_user_status(
+    return await async_crud.update_user_status(
         db=db, username=username, new_status=new_status
     )
+
+
+@router.patch('/users/role/', response_model=schemas.BulkUpdateResult)
+async def change_user_roles(
+    selection: schemas.BulkRoleUpdate,
+    db: Session | AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(
+        permission_required(enums.Permission.CHANGE_USER_ROLE)
+    ),
+):
+    updated_users = await async_crud.bulk_update_user_roles(
+        db=db,
+        usernames=list(dict.fromkeys(selection.usernames)),
+        user_ids=list(dict.fromkeys(selection.ids)),
+        new_role=selection.new_role,
+        batch_size=BULK_UPDATE_BATCH_SIZE,
+    )
+    return _make_bulk_result(selection, updated_users)
+
+
+@router.patch('/users/status/', response_model=schemas.BulkUpdateResult)
+async def change_user_statuses(
+    selection: schemas.BulkStatusUpdate,
+    db: Session | AsyncSession = Depends(get_db),
+    current_user: schemas.User = Depends(
+        permission_required(enums.Permission.CHANGE_USER_STATUS)
+    ),
+):
+    updated_users = await async_crud.bulk_update_user_statuses(
+        db=db,
+        usernames=list(dict.fromkeys(selection.usernames)),
+        user_ids=list(dict.fromkeys(selection.ids)),
+        new_status=selection.new_status,
+        batch_size=BULK_UPDATE_BATCH_SIZE,
+    )
+    return _make_bulk_result(selection, updated_users)
@@ -1,10 +1,21 @@
 from datetime import datetime
-from typing import Optional
+from typing import Generic, Optional, TypeVar
 
 from fastapi import UploadFile
-from pydantic import BaseModel, ConfigDict, Field, EmailStr
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    EmailStr,
+    computed_field,
+    field_validator,
+    model_validator,
+)
 
-from shenase import enums
+from shenase import enums, utils
+from shenase.config import BULK_UPDATE_MAX_ITEMS
+
+T = TypeVar('T')
 
 
 class ProfileBase(BaseModel):
@@ -24,6 +35,11 @@ class Profile(ProfileBase):
     id: int
     user_id: int
 
+    @computed_field
+    @property
+    def avatar_urls(self) -> dict[str, str]:
+        return utils.get_avatar_urls(self.avatar)
+
 
 class UserBase(BaseModel):
     username: str = Field(..., min_length=3, max_length=35)
@@ -34,6 +50,21 @@ class UserCreate(UserBase, ProfileCreate):
     password: str = Field(..., min_length=8, max_length=65)
 
 
+class UserImport(UserCreate):
+    password: Optional[str] = Field(None, min_length=8, max_length=65)
+    hashed_password: Optional[str] = Field(
+        None, pattern=r'^\$2[aby]\$\d{2}\$[./A-Za-z0-9]{53}$'
+    )
+
+    @model_validator(mode='after')
+    def check_password(self) -> 'UserImport':
+        if (self.password is None) == (self.hashed_password is None):
+            raise ValueError(
+                'Exactly one of `password` and `hashed_password` is required.'
+            )
+        return self
+
+
 class User(UserBase):
     model_config = ConfigDict(from_attributes=True)
 
@@ -45,6 +76,16 @@ class User(UserBase):
     profile: Optional[Profile] = None
 
 
+class SessionInfo(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    status: enums.SessionStatus
+    created_at: Optional[datetime] = None
+    expires_at: datetime
+    current: bool = False
+
+
 class UserProfileUpdate(BaseModel):
     username: Optional[str] = Field(None, min_length=3, max_length=35)
     email: Optional[EmailStr] = None
@@ -53,3 +94,70 @@ class UserProfileUpdate(BaseModel):
     bio: Optional[str] = Field(None, max_length=300)
     location: Optional[str] = Field(None, max_length=200)
     avatar: Optional[UploadFile] = None
+
+
+class BulkUserSelection(BaseModel):
+    usernames: list[str] = Field([], max_length=BULK_UPDATE_MAX_ITEMS)
+    ids: list[int] = Field([], max_length=BULK_UPDATE_MAX_ITEMS)
+
+
+class BulkRoleUpdate(BulkUserSelection):
+    new_role: enums.UserRole
+
+
+class BulkStatusUpdate(BulkUserSelection):
+    new_status: enums.UserStatus
+
+
+class BulkUpdateItem(BaseModel):
+    key: str | int
+    user_id: Optional[int] = None
+    updated: bool
+
+
+class BulkUpdateResult(BaseModel):
+    updated: int
+    not_found: int
+    items: list[BulkUpdateItem]
+
+
+class UserImportError(BaseModel):
+    line: int
+    error: str
+
+
+class UserImportResult(BaseModel):
+    processed: int
+    created: int
+    failed: int
+    errors: list[UserImportError]
+
+
+class RolePermissionsUpdate(BaseModel):
+    permissions: list[str]
+
+    @field_validator('permissions')
+    @classmethod
+    def check_permissions(cls, permissions: list[str]) -> list[str]:
+        unknown = set(permissions) - set(enums.Permission.__members__)
+        if unknown:
+            raise ValueError(f'Unknown permissions: {sorted(unknown)}.')
+        return list(dict.fromkeys(permissions))
+
+
+class RolePermissions(RolePermissionsUpdate):
+    role: enums.UserRole
+
+
+class AvatarUpload(BaseModel):
+    key: str
+    token: str
+    url: str
+    method: str
+    fields: dict[str, str]
+    expires_at: datetime
+
+
+class Page(BaseModel, Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str] = None
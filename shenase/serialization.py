@@ -0,0 +1,60 @@
+import functools
+import types
+from typing import Any, Mapping, Optional, Union, get_args, get_origin
+
+from pydantic import BaseModel, EmailStr, TypeAdapter, create_model
+from starlette.background import BackgroundTask
+from starlette.responses import Response
+
+
+def _get_trusted_annotation(annotation: Any) -> Any:
+    origin = get_origin(annotation)
+    if annotation is EmailStr:
+        return str
+    elif origin in (Union, types.UnionType):
+        return Union[tuple(map(_get_trusted_annotation, get_args(annotation)))]
+    elif origin is list:
+        return list[_get_trusted_annotation(get_args(annotation)[0])]
+    elif isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return _get_trusted_model(annotation)
+    return annotation
+
+
+@functools.cache
+def _get_trusted_model(model: type[BaseModel]) -> type[BaseModel]:
+    fields = {}
+    for name, field in model.model_fields.items():
+        annotation = _get_trusted_annotation(field.annotation)
+        if annotation != field.annotation:
+            fields[name] = (annotation, field)
+    if not fields:
+        return model
+    return create_model(model.__name__, __base__=model, **fields)
+
+
+class ResponseSerializer:
+    def __init__(self, response_type: Any) -> None:
+        self.adapter = TypeAdapter(_get_trusted_annotation(response_type))
+
+    def dump_json(self, content: Any) -> bytes:
+        return self.adapter.dump_json(
+            self.adapter.validate_python(content, from_attributes=True)
+        )
+
+
+class SerializedJSONResponse(Response):
+    media_type = 'application/json'
+
+    def __init__(
+        self,
+        content: Any,
+        serializer: ResponseSerializer,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None,
+        background: Optional[BackgroundTask] = None,
+    ) -> None:
+        self.serializer = serializer
+        super().__init__(content, status_code, headers, background=background)
+
+    def render(self, content: Any) -> bytes:
+        return self.serializer.dump_json(content)
@@ -0,0 +1,228 @@
+import io
+import mimetypes
+import os
+import shutil
+import tempfile
+import time
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Iterator, Optional
+from urllib.parse import urlencode
+
+from shenase import utils
+from shenase.config import (
+    AVATAR_STORAGE_BACKEND,
+    AVATAR_STORAGE_PATH,
+    AVATAR_MAX_SIZE,
+    AVATAR_FILE_MODE,
+    AVATAR_CACHE_MAX_AGE,
+    AVATAR_S3_BUCKET,
+    AVATAR_S3_PREFIX,
+    AVATAR_S3_ENDPOINT_URL,
+    AVATAR_S3_REGION,
+)
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+except ImportError:
+    boto3 = ClientError = None
+
+TEMP_PREFIX = '.upload-'
+
+
+def _get_content_type(filename: str) -> str:
+    return mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+
+class AvatarStorage(ABC):
+    @abstractmethod
+    def save(self, filename: str, source: BinaryIO) -> None: ...
+
+    @abstractmethod
+    def open(self, filename: str) -> BinaryIO: ...
+
+    @abstractmethod
+    def modified_at(self, filename: str) -> Optional[float]: ...
+
+    @abstractmethod
+    def delete(self, filename: str) -> None: ...
+
+    @abstractmethod
+    def list(self) -> Iterator[tuple[str, float]]: ...
+
+    @abstractmethod
+    def create_upload(
+        self,
+        filename: str,
+        expire_seconds: int,
+    ) -> dict[str, Any]: ...
+
+    def exists(self, filename: str) -> bool:
+        return self.modified_at(filename) is not None
+
+
+class LocalAvatarStorage(AvatarStorage):
+    def __init__(self, path: str, upload_url: str = '/avatars/uploads'):
+        self.path = path
+        self.upload_url = upload_url
+
+    def _get_path(self, filename: str) -> str:
+        if os.path.basename(filename) != filename or filename in ('', '..'):
+            raise ValueError(f'Invalid avatar filename `{filename}`.')
+        return os.path.join(self.path, filename)
+
+    def save(self, filename: str, source: BinaryIO) -> None:
+        file_path = self._get_path(filename)
+        upload = tempfile.NamedTemporaryFile(
+            dir=self.path, prefix=TEMP_PREFIX, delete=False
+        )
+        try:
+            with upload:
+                shutil.copyfileobj(source, upload)
+            os.chmod(upload.name, AVATAR_FILE_MODE)
+            os.replace(upload.name, file_path)
+        except BaseException:
+            os.unlink(upload.name)
+            raise
+
+    def open(self, filename: str) -> BinaryIO:
+        return open(self._get_path(filename), 'rb')
+
+    def modified_at(self, filename: str) -> Optional[float]:
+        try:
+            return os.stat(self._get_path(filename)).st_mtime
+        except FileNotFoundError:
+            return None
+
+    def delete(self, filename: str) -> None:
+        try:
+            os.unlink(self._get_path(filename))
+        except FileNotFoundError:
+            pass
+
+    def list(self) -> Iterator[tuple[str, float]]:
+        for entry in os.scandir(self.path):
+            if entry.is_file():
+                yield entry.name, entry.stat().st_mtime
+
+    def create_upload(
+        self,
+        filename: str,
+        expire_seconds: int,
+    ) -> dict[str, Any]:
+        expires = int(time.time()) + expire_seconds
+        query = urlencode(
+            {
+                'expires': expires,
+                'signature': utils.sign(f'{filename}:{expires}'),
+            }
+        )
+        return {
+            'url': f'{self.upload_url}/{filename}?{query}',
+            'method': 'PUT',
+            'fields': {},
+        }
+
+
+class S3AvatarStorage(AvatarStorage):
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = '',
+        max_size: int = AVATAR_MAX_SIZE,
+        **client_options: Any,
+    ):
+        if boto3 is None:
+            raise RuntimeError(
+                'S3 avatar storage requires boto3; install the `s3` extra.'
+            )
+        self.bucket = bucket
+        self.prefix = prefix
+        self.max_size = max_size
+        self.client = boto3.client('s3', **client_options)
+
+    def _get_headers(self, filename: str) -> dict[str, str]:
+        return {
+            'Content-Type': _get_content_type(filename),
+            'Cache-Control': (
+                f'public, max-age={AVATAR_CACHE_MAX_AGE}, immutable'
+            ),
+        }
+
+    def save(self, filename: str, source: BinaryIO) -> None:
+        headers = self._get_headers(filename)
+        self.client.upload_fileobj(
+            source,
+            self.bucket,
+            self.prefix + filename,
+            ExtraArgs={
+                'ContentType': headers['Content-Type'],
+                'CacheControl': headers['Cache-Control'],
+            },
+        )
+
+    def open(self, filename: str) -> BinaryIO:
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=self.prefix + filename
+        )
+        return io.BytesIO(response['Body'].read())
+
+    def modified_at(self, filename: str) -> Optional[float]:
+        try:
+            response = self.client.head_object(
+                Bucket=self.bucket, Key=self.prefix + filename
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return None
+            raise
+        return response['LastModified'].timestamp()
+
+    def delete(self, filename: str) -> None:
+        self.client.delete_object(
+            Bucket=self.bucket, Key=self.prefix + filename
+        )
+
+    def list(self) -> Iterator[tuple[str, float]]:
+        paginator = self.client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for item in page.get('Contents', ()):
+                filename = item['Key'][len(self.prefix) :]
+                if '/' not in filename:
+                    yield filename, item['LastModified'].timestamp()
+
+    def create_upload(
+        self,
+        filename: str,
+        expire_seconds: int,
+    ) -> dict[str, Any]:
+        headers = self._get_headers(filename)
+        upload = self.client.generate_presigned_post(
+            Bucket=self.bucket,
+            Key=self.prefix + filename,
+            Fields=headers,
+            Conditions=[
+                ['content-length-range', 1, self.max_size],
+                *({name: value} for name, value in headers.items()),
+            ],
+            ExpiresIn=expire_seconds,
+        )
+        return {
+            'url': upload['url'],
+            'method': 'POST',
+            'fields': upload['fields'],
+        }
+
+
+def create_storage() -> AvatarStorage:
+    if AVATAR_STORAGE_BACKEND == 's3':
+        return S3AvatarStorage(
+            bucket=AVATAR_S3_BUCKET,
+            prefix=AVATAR_S3_PREFIX,
+            endpoint_url=AVATAR_S3_ENDPOINT_URL,
+            region_name=AVATAR_S3_REGION,
+        )
+    return LocalAvatarStorage(AVATAR_STORAGE_PATH)
+
+
+storage = create_storage()
@@ -0,0 +1,65 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+
+from fastapi.concurrency import run_in_threadpool
+
+from shenase import crud
+from shenase.database import SessionLocal
+from shenase.config import (
+    SESSION_SWEEP_INTERVAL_SECONDS,
+    SESSION_SWEEP_BATCH_SIZE,
+    SESSION_RETENTION_DAYS,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def sweep_sessions(
+    retention_days: int = SESSION_RETENTION_DAYS,
+    batch_size: int = SESSION_SWEEP_BATCH_SIZE,
+) -> tuple[int, int]:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    with SessionLocal() as db:
+        expired = crud.expire_sessions(db, now)
+        purged = crud.purge_sessions(
+            db, now, timedelta(days=retention_days), batch_size
+        )
+    return expired, purged
+
+
+async def run_sweeper(
+    interval: float = SESSION_SWEEP_INTERVAL_SECONDS,
+) -> None:
+    while True:
+        try:
+            expired, purged = await run_in_threadpool(sweep_sessions)
+            logger.info(
+                'Session sweep expired %d and purged %d sessions.',
+                expired,
+                purged,
+            )
+        except Exception:
+            logger.exception('Session sweep failed.')
+        await asyncio.sleep(interval)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description='Expire stale sessions and purge old inactive ones.'
+    )
+    parser.add_argument(
+        '--retention-days', type=int, default=SESSION_RETENTION_DAYS
+    )
+    parser.add_argument(
+        '--batch-size', type=int, default=SESSION_SWEEP_BATCH_SIZE
+    )
+    args = parser.parse_args()
+
+    expired, purged = sweep_sessions(args.retention_days, args.batch_size)
+    print(f'Expired {expired} and purged {purged} sessions.')
+
+
+if __name__ == '__main__':
+    main()
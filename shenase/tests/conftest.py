@@ -1,7 +1,15 @@
 import os
+from contextlib import asynccontextmanager, contextmanager
 from urllib.parse import urlparse
-from unittest.mock import Mock, patch
-from typing import Optional, Generator, Any
+from unittest.mock import AsyncMock, Mock, patch
+from typing import (
+    Optional,
+    Generator,
+    AsyncGenerator,
+    Any,
+    Callable,
+    ContextManager,
+)
 
 import pytest
 from fastapi.testclient import TestClient
@@ -10,8 +18,16 @@ from sqlalchemy.orm import Session, sessionmaker
 
 from shenase import models, schemas, crud, enums
 from shenase.main import app
+from shenase.cache import session_cache
+from shenase.revocation import revocation_list
+from shenase.ratelimit import login_rate_limiter
+from shenase.permissions import (
+    DEFAULT_ROLE_PERMISSIONS,
+    permission_table,
+    get_default_role_permissions,
+)
 from shenase.database import Base
-from shenase.dependencies import get_db
+from shenase.dependencies import get_db, get_read_db
 from shenase.config import TEST_DATABASE_URL
 
 engine = create_engine(
@@ -22,13 +38,20 @@ TestingSessionLocal = sessionmaker(
 )
 
 Base.metadata.create_all(bind=engine)
+with TestingSessionLocal() as db:
+    crud.seed_role_permissions(db, DEFAULT_ROLE_PERMISSIONS)
+
+
+@pytest.fixture(scope='session')
+def anyio_backend() -> str:
+    return 'asyncio'
 
 
 @pytest.fixture(scope='function')
 def test_db_session() -> Generator[Session, None, None]:
     connection = engine.connect()
     transaction = connection.begin()
-    session = Session(bind=connection)
+    session = Session(bind=connection, expire_on_commit=False)
 
     nested = connection.begin_nested()
 
@@ -59,11 +82,59 @@ def test_client(
             test_db_session.close()
 
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
 
     with TestClient(app) as test_client:
         yield test_client
 
 
+@pytest.fixture(scope='function')
+def capture_queries() -> Callable[[], ContextManager[list[tuple[str, Any]]]]:
+    @contextmanager
+    def capture() -> Generator[list[tuple[str, Any]], None, None]:
+        queries = []
+
+        def before_cursor_execute(
+            connection: Any,
+            cursor: Any,
+            statement: str,
+            parameters: Any,
+            context: Any,
+            executemany: bool,
+        ) -> None:
+            if not statement.startswith(('SAVEPOINT', 'RELEASE', 'ROLLBACK')):
+                queries.append((statement, parameters))
+
+        event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            yield queries
+        finally:
+            event.remove(
+                engine, 'before_cursor_execute', before_cursor_execute
+            )
+
+    return capture
+
+
+@pytest.fixture(scope='function')
+def assert_max_queries(
+    capture_queries: Callable[[], ContextManager[list[tuple[str, Any]]]],
+) -> Callable[[int], ContextManager[list[tuple[str, Any]]]]:
+    @contextmanager
+    def assert_max(
+        max_queries: int,
+    ) -> Generator[list[tuple[str, Any]], None, None]:
+        with capture_queries() as queries:
+            yield queries
+        statements = '\n'.join(statement for statement, _ in queries)
+        assert len(queries) <= max_queries, (
+            f'Expected at most {max_queries} queries, '
+            f'got {len(queries)}:\n{statements}'
+        )
+
+    return assert_max
+
+
 @pytest.fixture(scope='function')
 def create_test_admin_user(
     test_db_session: Session,
@@ -101,21 +172,33 @@ def create_test_user(
 def mock_middlewares_get_db(
     test_db_session: Session,
 ) -> Generator[Mock, None, None]:
-    def get_test_db() -> Generator[Session, None, None]:
+    @asynccontextmanager
+    async def test_session_scope() -> AsyncGenerator[Session, None]:
         yield test_db_session
 
-    with patch('shenase.middlewares.get_db') as mock_get_db:
-        mock_get_db.side_effect = get_test_db
+    with patch('shenase.middlewares.session_scope') as mock_get_db:
+        mock_get_db.side_effect = test_session_scope
         yield mock_get_db
 
 
-@pytest.fixture(scope='session')
+@pytest.fixture(scope='function')
 def mock_save_avatar() -> Generator[Mock, None, None]:
-    with patch('shenase.crud.save_avatar') as mock_save_avatar:
+    with patch(
+        'shenase.avatars.save_avatar', new_callable=AsyncMock
+    ) as mock_save_avatar:
         mock_save_avatar.return_value = 'mocked_avatar_path.png'
         yield mock_save_avatar
 
 
+@pytest.fixture(scope='function', autouse=True)
+def clear_session_cache() -> Generator[None, None, None]:
+    yield
+    session_cache.clear()
+    revocation_list.clear()
+    permission_table.load(get_default_role_permissions())
+    login_rate_limiter.backend.clear()
+
+
 @pytest.fixture(scope='session', autouse=True)
 def teardown_test_database() -> Generator[None, None, None]:
     yield
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta, timezone
+from typing import Callable, ContextManager
+
+import pytest
+from sqlalchemy.orm import Session
+
+from shenase import models, crud
+from shenase.activity import SessionActivityTracker
+
+
+@pytest.mark.anyio
+async def test_activity_flush_extends_aging_sessions(
+    test_db_session: Session,
+    create_test_user: models.User,
+    assert_max_queries: Callable[[int], ContextManager],
+) -> None:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    aging_session, fresh_session = (
+        crud.create_session(
+            db=test_db_session,
+            user_id=create_test_user.id,
+            client_fingerprint='fingerprint',
+        )
+        for _ in range(2)
+    )
+    aging_session.expires_at = now + timedelta(days=1)
+    fresh_session.expires_at = now + timedelta(days=29)
+    test_db_session.commit()
+    fresh_expires_at = fresh_session.expires_at
+
+    tracker = SessionActivityTracker(
+        lifetime=timedelta(days=30),
+        extend_after_fraction=0.5,
+        flush_interval=60,
+    )
+    for _ in range(3):
+        tracker.touch(aging_session.access_token)
+        tracker.touch(fresh_session.access_token)
+    assert tracker.pending() == 2
+
+    with assert_max_queries(3):
+        assert await tracker.flush(test_db_session) == 1
+    assert tracker.pending() == 0
+    assert await tracker.flush(test_db_session) == 0
+
+    test_db_session.expire_all()
+    assert aging_session.expires_at > now + timedelta(days=29)
+    assert fresh_session.expires_at == fresh_expires_at
+    assert aging_session.last_seen_at >= now
+    assert fresh_session.last_seen_at >= now
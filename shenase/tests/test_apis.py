@@ -1,10 +1,11 @@
 import os
+from typing import Callable, ContextManager
 from unittest.mock import Mock
 
 from fastapi.testclient import TestClient
 
 from shenase import models, enums
-from shenase.config import DEFAULT_AVATAR
+from shenase.config import AVATAR_UPLOAD_FOLDER, DEFAULT_AVATAR
 
 
 def test_create_user(test_client: TestClient) -> None:
@@ -61,6 +62,9 @@ def test_get_user_profile(
     data = response.json()
     assert data['display_name'] == 'John Doe'
     assert data['avatar'] == DEFAULT_AVATAR
+    assert data['avatar_urls']['original'] == (
+        f'/{AVATAR_UPLOAD_FOLDER}/{DEFAULT_AVATAR}'
+    )
     assert data['bio'] is None
     assert data['location'] is None
 
@@ -103,6 +107,35 @@ def test_change_user_status(
     assert data['status'] == enums.UserStatus.INACTIVE
 
 
+def test_bulk_change_user_status(
+    test_client: TestClient,
+    create_test_admin_user: models.User,
+    create_test_user: models.User,
+) -> None:
+    login_response = test_client.post(
+        '/login/', json={'username': 'adminuser', 'password': 'testpass123'}
+    )
+    access_token = login_response.cookies.get('access_token')
+    test_client.cookies.set('access_token', access_token)
+    response = test_client.patch(
+        '/users/status/',
+        json={
+            'usernames': ['johndoe', 'missinguser', 'johndoe'],
+            'ids': [0],
+            'new_status': enums.UserStatus.SUSPENDED.value,
+        },
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data['updated'] == 1
+    assert data['not_found'] == 2
+    assert data['items'] == [
+        {'key': 'johndoe', 'user_id': create_test_user.id, 'updated': True},
+        {'key': 'missinguser', 'user_id': None, 'updated': False},
+        {'key': 0, 'user_id': None, 'updated': False},
+    ]
+
+
 def test_update_user(
     test_client: TestClient,
     create_test_user: models.User,
@@ -166,3 +199,202 @@ def test_upload_avatar(
     assert response.status_code == 200
     data = response.json()
     assert data['profile']['avatar'] == 'mocked_avatar_path.png'
+
+
+def test_logout_invalidates_cached_session(
+    test_client: TestClient,
+    create_test_user: models.User,
+    mock_middlewares_get_db: Mock,
+) -> None:
+    login_response = test_client.post(
+        '/login/', json={'username': 'johndoe', 'password': 'password123'}
+    )
+    access_token = login_response.cookies.get('access_token')
+    test_client.cookies.set('access_token', access_token)
+    assert test_client.get('/users/me/').status_code == 200
+    assert test_client.get('/users/me/').status_code == 200
+
+    test_client.post('/logout/')
+    test_client.cookies.set('access_token', access_token)
+    response = test_client.get('/users/me/')
+    assert response.status_code == 404
+
+
+def test_revoke_other_sessions(
+    test_client: TestClient,
+    create_test_user: models.User,
+    mock_middlewares_get_db: Mock,
+) -> None:
+    access_tokens = [
+        test_client.post(
+            '/login/',
+            json={'username': 'johndoe', 'password': 'password123'},
+        ).cookies.get('access_token')
+        for _ in range(3)
+    ]
+    test_client.cookies.set('access_token', access_tokens[-1])
+
+    response = test_client.get('/users/me/sessions/')
+    assert response.status_code == 200
+    assert [session['current'] for session in response.json()] == [
+        True,
+        False,
+        False,
+    ]
+
+    response = test_client.delete('/users/me/sessions/')
+    assert response.json() == {'revoked': 2}
+    assert test_client.get('/users/me/').status_code == 200
+    test_client.cookies.set('access_token', access_tokens[0])
+    assert test_client.get('/users/me/').status_code == 404
+
+
+def test_static_avatar_skips_session_lookup(
+    test_client: TestClient,
+    mock_middlewares_get_db: Mock,
+) -> None:
+    test_client.cookies.set('access_token', 'invalid-token')
+    response = test_client.get(f'/{AVATAR_UPLOAD_FOLDER}/{DEFAULT_AVATAR}')
+    assert response.status_code == 200
+    assert 'immutable' not in response.headers['cache-control']
+    mock_middlewares_get_db.assert_not_called()
+
+
+def test_read_users_pagination(
+    test_client: TestClient,
+    create_test_admin_user: models.User,
+    create_test_user: models.User,
+) -> None:
+    login_response = test_client.post(
+        '/login/', json={'username': 'adminuser', 'password': 'testpass123'}
+    )
+    access_token = login_response.cookies.get('access_token')
+    test_client.cookies.set('access_token', access_token)
+
+    first_page = test_client.get('/users/', params={'limit': 1}).json()
+    assert [user['username'] for user in first_page['items']] == ['adminuser']
+    assert first_page['next_cursor'] is not None
+
+    second_page = test_client.get(
+        '/users/', params={'limit': 1, 'cursor': first_page['next_cursor']}
+    ).json()
+    assert [user['username'] for user in second_page['items']] == ['johndoe']
+    assert second_page['next_cursor'] is None
+
+    response = test_client.get(
+        '/users/', params={'role': enums.UserRole.ADMIN, 'order': 'desc'}
+    )
+    assert [user['username'] for user in response.json()['items']] == [
+        'adminuser'
+    ]
+
+
+def test_read_profiles_invalid_cursor(test_client: TestClient) -> None:
+    response = test_client.get('/profiles/', params={'cursor': 'not-a-cursor'})
+    assert response.status_code == 400
+
+
+def test_read_users_me_query_count(
+    test_client: TestClient,
+    create_test_user: models.User,
+    mock_middlewares_get_db: Mock,
+    assert_max_queries: Callable[[int], ContextManager],
+) -> None:
+    login_response = test_client.post(
+        '/login/', json={'username': 'johndoe', 'password': 'password123'}
+    )
+    access_token = login_response.cookies.get('access_token')
+    test_client.cookies.set('access_token', access_token)
+
+    with assert_max_queries(1):
+        response = test_client.get('/users/me/')
+    assert response.json()['profile']['display_name'] == 'John Doe'
+
+
+def test_read_users_query_count(
+    test_client: TestClient,
+    create_test_admin_user: models.User,
+    create_test_user: models.User,
+    assert_max_queries: Callable[[int], ContextManager],
+) -> None:
+    login_response = test_client.post(
+        '/login/', json={'username': 'adminuser', 'password': 'testpass123'}
+    )
+    access_token = login_response.cookies.get('access_token')
+    test_client.cookies.set('access_token', access_token)
+
+    with assert_max_queries(3):
+        response = test_client.get('/users/')
+    assert all(user['profile'] for user in response.json()['items'])
+
+
+def test_read_user_profile_query_count(
+    test_client: TestClient,
+    create_test_user: models.User,
+    assert_max_queries: Callable[[int], ContextManager],
+) -> None:
+    with assert_max_queries(1):
+        response = test_client.get('/users/johndoe/profile/')
+    assert response.status_code == 200
+
+
+def test_read_user_profile_conditional_get(
+    test_client: TestClient,
+    create_test_user: models.User,
+    assert_max_queries: Callable[[int], ContextManager],
+) -> None:
+    response = test_client.get('/users/johndoe/profile/')
+    etag = response.headers['etag']
+    assert response.headers['cache-control'].startswith('public')
+    assert 'last-modified' in response.headers
+
+    with assert_max_queries(1):
+        response = test_client.get(
+            '/users/johndoe/profile/', headers={'If-None-Match': etag}
+        )
+    assert response.status_code == 304
+    assert response.headers['etag'] == etag
+    assert response.content == b''
+
+    response = test_client.get(
+        '/users/johndoe/profile/',
+        headers={'If-Modified-Since': response.headers['last-modified']},
+    )
+    assert response.status_code == 304
+
+    login_response = test_client.post(
+        '/login/', json={'username': 'johndoe', 'password': 'password123'}
+    )
+    test_client.cookies.set(
+        'access_token', login_response.cookies.get('access_token')
+    )
+    test_client.patch('/users/me/', data={'bio': 'An updated bio.'})
+
+    response = test_client.get(
+        '/users/johndoe/profile/', headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 200
+    assert response.headers['etag'] != etag
+    assert response.json()['bio'] == 'An updated bio.'
+
+
+def test_read_profiles_conditional_get(
+    test_client: TestClient,
+    create_test_user: models.User,
+    assert_max_queries: Callable[[int], ContextManager],
+) -> None:
+    response = test_client.get('/profiles/', params={'limit': 1})
+    etag = response.headers['etag']
+
+    with assert_max_queries(1):
+        response = test_client.get(
+            '/profiles/',
+            params={'limit': 1},
+            headers={'If-None-Match': f'"other", {etag}'},
+        )
+    assert response.status_code == 304
+
+    response = test_client.get(
+        '/profiles/', params={'order': 'desc'}, headers={'If-None-Match': etag}
+    )
+    assert response.status_code == 200
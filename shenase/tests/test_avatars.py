@@ -0,0 +1,273 @@
+import io
+import json
+import os
+import stat
+import time
+from pathlib import Path
+from typing import Generator
+
+import pytest
+from fastapi import FastAPI, UploadFile
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from shenase import models, avatars, storage, utils
+from shenase.exceptions import AvatarTooLargeError, InvalidAvatarError
+from shenase.config import DEFAULT_AVATAR
+
+AVATAR_BYTES = (Path(__file__).parent / 'avatar.png').read_bytes()
+
+
+@pytest.fixture(scope='function')
+def avatar_storage(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> Generator[Path, None, None]:
+    monkeypatch.setattr(
+        avatars, 'storage', storage.LocalAvatarStorage(str(tmp_path))
+    )
+    yield tmp_path
+
+
+@pytest.mark.anyio
+async def test_identical_avatars_share_a_file(avatar_storage: Path) -> None:
+    first = await avatars.save_avatar(
+        UploadFile(io.BytesIO(AVATAR_BYTES), filename='me.PNG')
+    )
+    second = await avatars.save_avatar(
+        UploadFile(io.BytesIO(AVATAR_BYTES), filename='copy.png')
+    )
+
+    assert first == second
+    assert first.endswith('.png')
+    assert len(first) <= 35
+    assert sorted(os.listdir(avatar_storage)) == sorted(
+        [first]
+        + [
+            utils.get_avatar_derivative_filename(first, size)
+            for size in utils.AVATAR_DERIVATIVE_SIZES
+        ]
+    )
+
+
+def test_saved_avatars_use_file_mode(avatar_storage: Path) -> None:
+    avatars.storage.save('me.png', io.BytesIO(AVATAR_BYTES))
+
+    mode = stat.S_IMODE(os.stat(avatar_storage / 'me.png').st_mode)
+    assert mode == storage.AVATAR_FILE_MODE
+
+
+@pytest.mark.anyio
+async def test_avatar_derivatives_are_resized(avatar_storage: Path) -> None:
+    Image = pytest.importorskip('PIL.Image')
+    filename = await avatars.save_avatar(
+        UploadFile(io.BytesIO(AVATAR_BYTES), filename='me.png')
+    )
+
+    for size in utils.AVATAR_DERIVATIVE_SIZES:
+        derivative = utils.get_avatar_derivative_filename(filename, size)
+        with Image.open(avatar_storage / derivative) as image:
+            assert image.format == 'WEBP'
+            assert image.size == (size, size)
+    assert avatars.generate_derivatives(filename) == []
+
+
+@pytest.mark.anyio
+async def test_invalid_avatar_is_rejected(avatar_storage: Path) -> None:
+    pytest.importorskip('PIL')
+    with pytest.raises(InvalidAvatarError):
+        await avatars.save_avatar(
+            UploadFile(io.BytesIO(b'not-an-image'), filename='me.png')
+        )
+
+
+@pytest.mark.anyio
+async def test_decompression_bomb_is_rejected(avatar_storage: Path) -> None:
+    Image = pytest.importorskip('PIL.Image')
+    bomb = io.BytesIO()
+    Image.new('1', (10000, 10000)).save(bomb, format='PNG')
+    with pytest.raises(InvalidAvatarError):
+        await avatars.save_avatar(
+            UploadFile(io.BytesIO(bomb.getvalue()), filename='me.png')
+        )
+
+
+@pytest.mark.anyio
+async def test_oversized_avatar_is_rejected(
+    avatar_storage: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(avatars, 'AVATAR_MAX_SIZE', 8)
+    with pytest.raises(AvatarTooLargeError):
+        await avatars.save_avatar(
+            UploadFile(io.BytesIO(b'too-many-bytes'), filename='me.png')
+        )
+    assert os.listdir(avatar_storage) == []
+
+
+def test_collect_orphaned_avatars(
+    test_db_session: Session,
+    create_test_user: models.User,
+    avatar_storage: Path,
+) -> None:
+    create_test_user.profile.avatar = 'referenced.png'
+    test_db_session.commit()
+    for filename in (
+        'referenced.png',
+        'referenced.png.64.webp',
+        'orphaned.png',
+        'orphaned.png.64.webp',
+        DEFAULT_AVATAR,
+        f'{DEFAULT_AVATAR}.64.webp',
+    ):
+        file_path = avatar_storage / filename
+        file_path.write_bytes(b'image-bytes')
+        os.utime(file_path, (time.time() - 7200, time.time() - 7200))
+    (avatar_storage / 'recent.png').write_bytes(b'image-bytes')
+
+    removed = avatars.collect_orphaned_avatars(
+        test_db_session, grace_seconds=3600
+    )
+
+    assert sorted(removed) == ['orphaned.png', 'orphaned.png.64.webp']
+    assert sorted(os.listdir(avatar_storage)) == sorted(
+        [
+            'referenced.png',
+            'referenced.png.64.webp',
+            'recent.png',
+            DEFAULT_AVATAR,
+            f'{DEFAULT_AVATAR}.64.webp',
+        ]
+    )
+
+
+def test_avatar_files_are_cached_immutably(avatar_storage: Path) -> None:
+    (avatar_storage / 'hashed.png').write_bytes(b'image-bytes')
+    app = FastAPI()
+    app.mount('/avatars', avatars.AvatarStaticFiles(directory=avatar_storage))
+
+    with TestClient(app) as client:
+        response = client.get('/avatars/hashed.png')
+        assert response.status_code == 200
+        assert response.headers['cache-control'] == (
+            f'public, max-age={avatars.AVATAR_CACHE_MAX_AGE}, immutable'
+        )
+        response = client.get(
+            '/avatars/hashed.png',
+            headers={'If-None-Match': response.headers['etag']},
+        )
+        assert response.status_code == 304
+
+
+def test_direct_avatar_upload(
+    test_client: TestClient,
+    create_test_user: models.User,
+    avatar_storage: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    login_response = test_client.post(
+        '/login/', json={'username': 'johndoe', 'password': 'password123'}
+    )
+    test_client.cookies.set(
+        'access_token', login_response.cookies.get('access_token')
+    )
+
+    response = test_client.post(
+        '/users/me/avatar/uploads/', json={'filename': 'me.png'}
+    )
+    assert response.status_code == 200
+    upload = response.json()
+    assert upload['method'] == 'PUT'
+    assert upload['key'].endswith('.png')
+
+    response = test_client.put(
+        upload['url'].replace('signature=', 'signature=0'),
+        content=AVATAR_BYTES,
+    )
+    assert response.status_code == 403
+    response = test_client.put(upload['url'], content=AVATAR_BYTES)
+    assert response.status_code == 204
+    assert (avatar_storage / upload['key']).read_bytes() == AVATAR_BYTES
+
+    response = test_client.put(
+        '/users/me/avatar/', json={'key': upload['key'], 'token': '0'}
+    )
+    assert response.status_code == 404
+    with monkeypatch.context() as m:
+        m.setattr(avatars, 'AVATAR_UPLOAD_URL_EXPIRE_SECONDS', -1)
+        response = test_client.put(
+            '/users/me/avatar/',
+            json={'key': upload['key'], 'token': upload['token']},
+        )
+    assert response.status_code == 404
+    response = test_client.put(
+        '/users/me/avatar/',
+        json={'key': upload['key'], 'token': upload['token']},
+    )
+    assert response.status_code == 200
+    assert response.json()['profile']['avatar'] == upload['key']
+
+
+def test_s3_storage(monkeypatch: pytest.MonkeyPatch) -> None:
+    moto = pytest.importorskip('moto')
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    with moto.mock_aws():
+        s3_storage = storage.S3AvatarStorage(
+            bucket='avatars', prefix='avatars/', region_name='us-east-1'
+        )
+        s3_storage.client.create_bucket(Bucket='avatars')
+
+        s3_storage.save('me.png', io.BytesIO(AVATAR_BYTES))
+        assert s3_storage.exists('me.png')
+        assert not s3_storage.exists('missing.png')
+        with s3_storage.open('me.png') as f:
+            assert f.read() == AVATAR_BYTES
+        assert [name for name, _ in s3_storage.list()] == ['me.png']
+
+        upload = s3_storage.create_upload('new.png', 60)
+        assert upload['method'] == 'POST'
+        assert upload['fields']['key'] == 'avatars/new.png'
+
+        s3_storage.delete('me.png')
+        assert list(s3_storage.list()) == []
+
+
+def test_default_avatar_is_installed_in_s3(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    moto = pytest.importorskip('moto')
+    import requests
+
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setattr(
+        utils, 'AVATAR_PUBLIC_URL', 'https://avatars.s3.amazonaws.com/avatars'
+    )
+    with moto.mock_aws():
+        s3_storage = storage.S3AvatarStorage(
+            bucket='avatars', prefix='avatars/', region_name='us-east-1'
+        )
+        s3_storage.client.create_bucket(Bucket='avatars')
+        s3_storage.client.put_bucket_policy(
+            Bucket='avatars',
+            Policy=json.dumps(
+                {
+                    'Version': '2012-10-17',
+                    'Statement': [
+                        {
+                            'Effect': 'Allow',
+                            'Principal': '*',
+                            'Action': 's3:GetObject',
+                            'Resource': 'arn:aws:s3:::avatars/avatars/*',
+                        }
+                    ],
+                }
+            ),
+        )
+        monkeypatch.setattr(avatars, 'storage', s3_storage)
+
+        avatars.install_default_avatar()
+
+        for url in utils.get_avatar_urls(DEFAULT_AVATAR).values():
+            assert requests.get(url).status_code == 200
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+
+from shenase import schemas, enums
+from shenase.cache import SessionCache
+
+
+def _make_user(user_id: int) -> schemas.User:
+    return schemas.User(
+        id=user_id,
+        username=f'user{user_id}',
+        email=f'user{user_id}@example.com',
+        role=enums.UserRole.USER,
+        is_verified=False,
+        status=enums.UserStatus.ACTIVE,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+def _expires_in(seconds: int) -> datetime:
+    return datetime.now(timezone.utc) + timedelta(seconds=seconds)
+
+
+def test_cache_hit_and_miss() -> None:
+    cache = SessionCache(max_size=10, ttl=60)
+    cache.set('token', 'fingerprint', _make_user(1), _expires_in(3600))
+
+    assert cache.get('token', 'fingerprint').id == 1
+    assert cache.get('token', 'other-fingerprint') is None
+    assert cache.get('unknown', 'fingerprint') is None
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 2
+
+
+def test_cache_evicts_least_recently_used() -> None:
+    cache = SessionCache(max_size=2, ttl=60)
+    cache.set('a', 'fingerprint', _make_user(1), _expires_in(3600))
+    cache.set('b', 'fingerprint', _make_user(2), _expires_in(3600))
+    cache.get('a', 'fingerprint')
+    cache.set('c', 'fingerprint', _make_user(3), _expires_in(3600))
+
+    assert cache.get('b', 'fingerprint') is None
+    assert cache.get('a', 'fingerprint') is not None
+    assert cache.get('c', 'fingerprint') is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_cache_respects_session_expiry() -> None:
+    cache = SessionCache(max_size=10, ttl=60)
+    cache.set('token', 'fingerprint', _make_user(1), _expires_in(-1))
+    assert cache.get('token', 'fingerprint') is None
+
+
+def test_cache_invalidation() -> None:
+    cache = SessionCache(max_size=10, ttl=60)
+    cache.set('a', 'fingerprint', _make_user(1), _expires_in(3600))
+    cache.set('b', 'fingerprint', _make_user(1), _expires_in(3600))
+    cache.set('c', 'fingerprint', _make_user(2), _expires_in(3600))
+
+    cache.invalidate_user(1)
+    cache.invalidate_token('c')
+
+    assert cache.stats()['size'] == 0
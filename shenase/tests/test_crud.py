@@ -1,6 +1,17 @@
+from datetime import datetime, timedelta, timezone
+from typing import Callable, ContextManager
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import Session
 
-from shenase import models, schemas, crud, enums
+from shenase import models, schemas, crud, async_crud, enums, utils
+from shenase.database import Base
+from shenase.exceptions import (
+    UserNotFoundError,
+    UsernameAlreadyExistsError,
+    EmailAlreadyExistsError,
+)
 
 
 def test_create_user(test_db_session: Session) -> None:
@@ -91,3 +102,244 @@ def test_update_user_status(
         new_status=enums.UserStatus.SUSPENDED,
     )
     assert updated_user.status == enums.UserStatus.SUSPENDED
+
+
+@pytest.mark.anyio
+async def test_async_crud_with_async_session() -> None:
+    async_engine = create_async_engine('sqlite+aiosqlite://')
+    async with async_engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    async with AsyncSession(async_engine, expire_on_commit=False) as db:
+        user_data = schemas.UserCreate(
+            username='janedoe',
+            email='janedoe@example.com',
+            password='password123',
+            display_name='Jane Doe',
+        )
+        await async_crud.create_user(db=db, user=user_data)
+        user = await async_crud.get_user_by_username(db=db, username='janedoe')
+
+    assert user is not None
+    assert user.profile.display_name == 'Jane Doe'
+    await async_engine.dispose()
+
+
+def test_update_user_password(
+    test_db_session: Session,
+    create_test_user: models.User,
+) -> None:
+    updated_user = crud.update_user(
+        db=test_db_session,
+        user=schemas.UserProfileUpdate(password='newpassword123'),
+        current_user=create_test_user,
+    )
+    assert utils.verify_password(
+        'newpassword123', updated_user.hashed_password
+    )
+
+
+def test_expire_and_purge_sessions(
+    test_db_session: Session,
+    create_test_user: models.User,
+) -> None:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    for status, expires_at, revoked_at in (
+        (enums.SessionStatus.ACTIVE, now + timedelta(days=1), None),
+        (enums.SessionStatus.ACTIVE, now - timedelta(days=1), None),
+        (enums.SessionStatus.INACTIVE, now - timedelta(days=60), None),
+        (enums.SessionStatus.EXPIRED, now - timedelta(days=90), None),
+        (
+            enums.SessionStatus.INACTIVE,
+            now + timedelta(days=20),
+            now - timedelta(days=40),
+        ),
+        (
+            enums.SessionStatus.INACTIVE,
+            now + timedelta(days=20),
+            now - timedelta(days=1),
+        ),
+    ):
+        test_db_session.add(
+            models.Session(
+                client_fingerprint='fingerprint',
+                status=status,
+                expires_at=expires_at,
+                revoked_at=revoked_at,
+                user_id=create_test_user.id,
+            )
+        )
+    test_db_session.commit()
+
+    assert crud.expire_sessions(test_db_session, now) == 1
+    assert (
+        crud.purge_sessions(
+            test_db_session, now, timedelta(days=30), batch_size=1
+        )
+        == 3
+    )
+    statuses = [
+        session.status for session in test_db_session.query(models.Session)
+    ]
+    assert sorted(statuses) == [
+        enums.SessionStatus.ACTIVE,
+        enums.SessionStatus.EXPIRED,
+        enums.SessionStatus.INACTIVE,
+    ]
+
+
+def test_import_users_hides_database_errors(
+    test_db_session: Session,
+) -> None:
+    users = [
+        {
+            'username': username,
+            'email': f'{username}@example.com',
+            'hashed_password': 'not-a-real-hash',
+            'display_name': display_name,
+            'bio': None,
+            'location': None,
+        }
+        for username, display_name in (('alice', 'Alice'), ('bob', None))
+    ]
+
+    assert crud.import_users(test_db_session, users) == [
+        None,
+        'Failed to create user.',
+    ]
+    assert crud.get_user_by_username(test_db_session, 'alice') is not None
+
+
+def test_create_user_duplicates(
+    test_db_session: Session,
+    create_test_user: models.User,
+) -> None:
+    with pytest.raises(UsernameAlreadyExistsError):
+        crud.create_user(
+            db=test_db_session,
+            user=schemas.UserCreate(
+                username='johndoe',
+                email='another@example.com',
+                password='password123',
+                display_name='John Doe',
+            ),
+        )
+    with pytest.raises(EmailAlreadyExistsError):
+        crud.create_user(
+            db=test_db_session,
+            user=schemas.UserCreate(
+                username='anotheruser',
+                email='johndoe@example.com',
+                password='password123',
+                display_name='John Doe',
+            ),
+        )
+    assert crud.get_user_by_username(test_db_session, 'johndoe') is not None
+
+
+def test_write_paths_query_count(
+    test_db_session: Session,
+    assert_max_queries: Callable[[int], ContextManager],
+) -> None:
+    user_data = schemas.UserCreate(
+        username='johndoe',
+        email='johndoe@example.com',
+        password='password123',
+        display_name='John Doe',
+    )
+    with assert_max_queries(2):
+        user = crud.create_user(db=test_db_session, user=user_data)
+    with assert_max_queries(2):
+        crud.update_user(
+            db=test_db_session,
+            user=schemas.UserProfileUpdate(bio='Updated bio.'),
+            current_user=user,
+        )
+    with assert_max_queries(2):
+        updated_user = crud.update_user_status(
+            db=test_db_session,
+            username='johndoe',
+            new_status=enums.UserStatus.SUSPENDED,
+        )
+    assert updated_user.profile.bio == 'Updated bio.'
+
+    with pytest.raises(UserNotFoundError):
+        crud.update_user_role(
+            db=test_db_session,
+            username='missinguser',
+            new_role=enums.UserRole.ADMIN,
+        )
+
+
+def test_bulk_update_user_statuses(
+    test_db_session: Session,
+    assert_max_queries: Callable[[int], ContextManager],
+) -> None:
+    users = [
+        crud.create_user(
+            db=test_db_session,
+            user=schemas.UserCreate(
+                username=f'user{i}',
+                email=f'user{i}@example.com',
+                password='password123',
+                display_name=f'User {i}',
+            ),
+            hashed_password='hashed-password',
+        )
+        for i in range(3)
+    ]
+
+    with assert_max_queries(4) as queries:
+        updated_users = crud.bulk_update_user_statuses(
+            db=test_db_session,
+            usernames=['user0', 'user1', 'missinguser'],
+            user_ids=[users[2].id, users[0].id],
+            new_status=enums.UserStatus.SUSPENDED,
+            batch_size=2,
+        )
+    assert sum(statement.startswith('UPDATE') for statement, _ in queries) == 2
+    assert sorted(updated_users) == sorted(
+        (user.id, user.username) for user in users
+    )
+    test_db_session.expire_all()
+    assert all(
+        user.status == enums.UserStatus.SUSPENDED
+        and user.tokens_valid_after is not None
+        for user in users
+    )
+
+
+def test_create_session_evicts_oldest_sessions(
+    test_db_session: Session,
+    create_test_user: models.User,
+    assert_max_queries: Callable[[int], ContextManager],
+) -> None:
+    sessions = [
+        crud.create_session(
+            db=test_db_session,
+            user_id=create_test_user.id,
+            client_fingerprint='fingerprint',
+            max_active_sessions=2,
+        )
+        for _ in range(2)
+    ]
+    with assert_max_queries(2):
+        sessions.append(
+            crud.create_session(
+                db=test_db_session,
+                user_id=create_test_user.id,
+                client_fingerprint='fingerprint',
+                max_active_sessions=2,
+            )
+        )
+
+    active_sessions = crud.get_user_sessions(
+        test_db_session, create_test_user.id
+    )
+    assert [session.id for session in active_sessions] == [
+        sessions[2].id,
+        sessions[1].id,
+    ]
+    test_db_session.refresh(sessions[0])
+    assert sessions[0].status == enums.SessionStatus.INACTIVE
+    assert sessions[0].revoked_at is not None
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+
+import pytest
+
+from shenase import utils
+from shenase.hashing import PasswordHasher
+from shenase.exceptions import PasswordHashingUnavailableError
+
+
+@pytest.mark.anyio
+async def test_hash_and_verify() -> None:
+    hasher = PasswordHasher(max_workers=2, max_queue=2)
+    hashed_password = await hasher.hash('password123')
+
+    assert utils.verify_password('password123', hashed_password)
+    assert await hasher.verify('password123', hashed_password)
+    assert not await hasher.verify('wrongpassword', hashed_password)
+    assert hasher.stats()['completed'] == 3
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_failures_are_not_counted_as_completed() -> None:
+    hasher = PasswordHasher(max_workers=1, max_queue=0)
+    with pytest.raises(ValueError):
+        await hasher.run(int, 'not-a-number')
+
+    assert hasher.stats()['completed'] == 0
+    assert hasher.stats()['failed'] == 1
+    assert hasher.stats()['in_flight'] == 0
+    hasher.shutdown()
+
+
+@pytest.mark.anyio
+async def test_saturated_pool_rejects_requests() -> None:
+    hasher = PasswordHasher(max_workers=1, max_queue=0)
+    release = threading.Event()
+    blocked = asyncio.create_task(hasher.run(release.wait))
+    await asyncio.sleep(0)
+
+    assert hasher.stats()['saturation'] == 1
+    with pytest.raises(PasswordHashingUnavailableError) as exc_info:
+        await hasher.hash('password123')
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers['Retry-After'] == '1'
+
+    release.set()
+    await blocked
+    assert hasher.stats()['rejected'] == 1
+    assert hasher.stats()['in_flight'] == 0
+    hasher.shutdown()
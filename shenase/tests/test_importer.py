@@ -0,0 +1,188 @@
+import io
+import json
+from typing import AsyncIterator
+from unittest.mock import AsyncMock
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from shenase import models, crud, enums, importer, utils
+from shenase.exceptions import PasswordHashingUnavailableError
+
+HASHED_PASSWORD = utils.get_password_hash('password123')
+
+
+@pytest.mark.anyio
+async def test_import_users_from_csv(test_db_session: Session) -> None:
+    csv_file = io.StringIO(
+        'username,email,password,hashed_password,display_name,bio\n'
+        'alice,alice@example.com,password123,,Alice,Hello.\n'
+        f'bob,bob@example.com,,{HASHED_PASSWORD},Bob,\n'
+        'carol,not-an-email,password123,,Carol,\n'
+        'dave,dave@example.com,,,Dave,\n'
+        'alice,alice2@example.com,password123,,Alice Again,\n'
+    )
+
+    result = await importer.import_users(
+        test_db_session,
+        importer.read_rows(csv_file, enums.ImportFormat.CSV),
+        batch_size=2,
+    )
+
+    assert (result.processed, result.created, result.failed) == (5, 2, 3)
+    assert [error['line'] for error in result.errors] == [4, 5, 6]
+    alice = crud.get_user_by_username(test_db_session, 'alice')
+    assert utils.verify_password('password123', alice.hashed_password)
+    assert alice.profile.bio == 'Hello.'
+    bob = crud.get_user_by_username(test_db_session, 'bob')
+    assert bob.hashed_password == HASHED_PASSWORD
+    assert bob.role == enums.UserRole.USER
+
+
+@pytest.mark.anyio
+async def test_import_users_from_ndjson(
+    test_db_session: Session,
+    create_test_user: models.User,
+) -> None:
+    ndjson_file = io.StringIO(
+        '\n'.join(
+            [
+                json.dumps(
+                    {
+                        'username': 'erin',
+                        'email': 'erin@example.com',
+                        'hashed_password': HASHED_PASSWORD,
+                        'display_name': 'Erin',
+                    }
+                ),
+                '',
+                '{not json',
+                json.dumps(
+                    {
+                        'username': 'frank',
+                        'email': create_test_user.email,
+                        'hashed_password': HASHED_PASSWORD,
+                        'display_name': 'Frank',
+                    }
+                ),
+            ]
+        )
+    )
+
+    result = await importer.import_users(
+        test_db_session,
+        importer.read_rows(ndjson_file, enums.ImportFormat.NDJSON),
+    )
+
+    assert (result.processed, result.created, result.failed) == (3, 1, 2)
+    assert result.errors[1] == {
+        'line': 4,
+        'error': f'Email `{create_test_user.email}` already registered.',
+    }
+    assert crud.get_user_by_username(test_db_session, 'erin') is not None
+
+
+@pytest.mark.anyio
+async def test_read_ndjson_stream_across_chunks() -> None:
+    async def chunks() -> AsyncIterator[bytes]:
+        for chunk in (
+            b'{"name": "J',
+            b'\xc3',
+            b'\xbcrgen"}\n\n{bad',
+            b'\n[1]',
+        ):
+            yield chunk
+
+    rows = [row async for row in importer.read_ndjson_stream(chunks())]
+
+    assert rows == [(1, {'name': 'Jürgen'}), (3, None), (4, [1])]
+
+
+@pytest.mark.anyio
+async def test_import_reports_rows_when_hashing_is_unavailable(
+    test_db_session: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(importer, 'IMPORT_HASHING_MAX_WAIT_SECONDS', 0)
+    monkeypatch.setattr(
+        importer.password_hasher,
+        'hash',
+        AsyncMock(side_effect=PasswordHashingUnavailableError),
+    )
+    csv_file = io.StringIO(
+        'username,email,password,hashed_password,display_name\n'
+        'alice,alice@example.com,password123,,Alice\n'
+        f'bob,bob@example.com,,{HASHED_PASSWORD},Bob\n'
+    )
+
+    result = await importer.import_users(
+        test_db_session, importer.read_rows(csv_file, enums.ImportFormat.CSV)
+    )
+
+    assert (result.created, result.failed) == (1, 1)
+    assert result.errors == [
+        {'line': 2, 'error': 'Password hashing unavailable.'}
+    ]
+
+
+def test_import_users_endpoint(
+    test_client: TestClient,
+    create_test_admin_user: models.User,
+) -> None:
+    login_response = test_client.post(
+        '/login/', json={'username': 'adminuser', 'password': 'testpass123'}
+    )
+    test_client.cookies.set(
+        'access_token', login_response.cookies.get('access_token')
+    )
+    response = test_client.post(
+        '/users/import/',
+        files={
+            'file': (
+                'users.ndjson',
+                json.dumps(
+                    {
+                        'username': 'grace',
+                        'email': 'grace@example.com',
+                        'hashed_password': HASHED_PASSWORD,
+                        'display_name': 'Grace',
+                    }
+                ),
+                'application/x-ndjson',
+            )
+        },
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        'processed': 1,
+        'created': 1,
+        'failed': 0,
+        'errors': [],
+    }
+
+    response = test_client.post(
+        '/users/import/',
+        content='\n'.join(
+            json.dumps(
+                {
+                    'username': username,
+                    'email': f'{username}@example.com',
+                    'hashed_password': HASHED_PASSWORD,
+                    'display_name': username.title(),
+                }
+            )
+            for username in ('heidi', 'ivan')
+        ),
+        headers={'Content-Type': 'application/x-ndjson'},
+    )
+    assert response.status_code == 200
+    assert response.json()['created'] == 2
+
+    response = test_client.post(
+        '/users/import/',
+        params={'format': 'csv'},
+        content='username,email\n',
+        headers={'Content-Type': 'text/csv'},
+    )
+    assert response.status_code == 415
@@ -0,0 +1,110 @@
+from typing import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from shenase import models
+from shenase.metrics import Metrics, metrics, prometheus_client
+
+pytestmark = pytest.mark.skipif(
+    prometheus_client is None, reason='prometheus-client is not installed'
+)
+
+
+@pytest.fixture(scope='function')
+def enable_metrics() -> Generator[Metrics, None, None]:
+    metrics.enable()
+    yield metrics
+    metrics.disable()
+
+
+def _get_sample(name: str, **labels: str) -> float:
+    return metrics.registry.get_sample_value(name, labels) or 0
+
+
+def test_metrics_disabled(test_client: TestClient) -> None:
+    assert test_client.get('/metrics').status_code == 404
+
+
+def test_request_and_session_metrics(
+    test_client: TestClient,
+    create_test_user: models.User,
+    enable_metrics: Metrics,
+) -> None:
+    login_response = test_client.post(
+        '/login/', json={'username': 'johndoe', 'password': 'password123'}
+    )
+    test_client.cookies.set(
+        'access_token', login_response.cookies.get('access_token')
+    )
+    test_client.get('/users/me/')
+    test_client.get('/users/nobody/profile/')
+
+    assert (
+        _get_sample(
+            'shenase_http_requests_total',
+            route='login',
+            method='POST',
+            status='200',
+        )
+        == 1
+    )
+    assert (
+        _get_sample(
+            'shenase_http_request_duration_seconds_count',
+            route='read_users_me',
+            method='GET',
+        )
+        == 1
+    )
+    assert (
+        _get_sample(
+            'shenase_http_requests_total',
+            route='read_user_profile',
+            method='GET',
+            status='404',
+        )
+        == 1
+    )
+    assert (
+        _get_sample(
+            'shenase_password_hashing_duration_seconds_count',
+            operation='verify_password',
+        )
+        == 1
+    )
+    assert (
+        _get_sample('shenase_session_validations_total', outcome='valid') >= 1
+    )
+
+    response = test_client.get('/metrics')
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('text/plain')
+    assert b'shenase_http_requests_total' in response.content
+
+
+def test_pool_gauges(enable_metrics: Metrics) -> None:
+    engine = create_engine('sqlite:///:memory:')
+    pool_engine = create_engine(
+        'sqlite:///file::memory:?uri=true', pool_size=2, max_overflow=2
+    )
+    metrics.instrument_engine(engine, 'ignored')
+    metrics.instrument_engine(pool_engine, 'test')
+
+    connections = [pool_engine.connect() for _ in range(3)]
+    assert (
+        _get_sample('shenase_db_pool_checked_out_connections', engine='test')
+        == 3
+    )
+    assert (
+        _get_sample('shenase_db_pool_overflow_connections', engine='test') == 1
+    )
+    for connection in connections:
+        connection.close()
+    metrics.update_pool_gauges()
+    assert (
+        _get_sample('shenase_db_pool_checked_out_connections', engine='test')
+        == 0
+    )
+    metrics._pools.pop('test')
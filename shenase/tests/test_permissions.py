@@ -0,0 +1,105 @@
+from unittest.mock import Mock
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from shenase import models, crud, enums
+from shenase.permissions import (
+    DEFAULT_ROLE_PERMISSIONS,
+    PermissionTable,
+    combine,
+    permission_table,
+)
+
+
+def test_permission_table() -> None:
+    table = PermissionTable()
+    table.load(
+        [
+            (enums.UserRole.MODERATOR, 'READ_USERS'),
+            (enums.UserRole.MODERATOR, 'CHANGE_USER_STATUS'),
+            (enums.UserRole.MODERATOR, 'UNKNOWN_PERMISSION'),
+        ]
+    )
+
+    assert table.has(
+        enums.UserRole.MODERATOR,
+        combine(
+            [
+                enums.Permission.READ_USERS,
+                enums.Permission.CHANGE_USER_STATUS,
+            ]
+        ),
+    )
+    assert not table.has(
+        enums.UserRole.MODERATOR, enums.Permission.CHANGE_USER_ROLE
+    )
+    assert table.get(enums.UserRole.USER) == enums.Permission(0)
+
+
+def test_update_role_permissions(
+    test_client: TestClient,
+    test_db_session: Session,
+    create_test_admin_user: models.User,
+    create_test_user: models.User,
+    mock_middlewares_get_db: Mock,
+) -> None:
+    crud.update_user_role(
+        db=test_db_session,
+        username='johndoe',
+        new_role=enums.UserRole.MODERATOR,
+    )
+    login_response = test_client.post(
+        '/login/', json={'username': 'johndoe', 'password': 'password123'}
+    )
+    moderator_token = login_response.cookies.get('access_token')
+    test_client.cookies.set('access_token', moderator_token)
+    assert test_client.get('/users/').status_code == 403
+    assert test_client.get('/roles/').status_code == 403
+
+    login_response = test_client.post(
+        '/login/', json={'username': 'adminuser', 'password': 'testpass123'}
+    )
+    test_client.cookies.set(
+        'access_token', login_response.cookies.get('access_token')
+    )
+    response = test_client.put(
+        '/roles/moderator/permissions/',
+        json={'permissions': ['READ_USERS', 'CHANGE_USER_STATUS']},
+    )
+    assert response.status_code == 200
+    response = test_client.put(
+        '/roles/moderator/permissions/',
+        json={'permissions': ['FLY']},
+    )
+    assert response.status_code == 422
+    response = test_client.put(
+        '/roles/admin/permissions/',
+        json={'permissions': ['READ_USERS']},
+    )
+    assert response.status_code == 409
+    assert enums.Permission.MANAGE_ROLES in permission_table.get(
+        enums.UserRole.ADMIN
+    )
+
+    test_client.cookies.set('access_token', moderator_token)
+    assert test_client.get('/users/').status_code == 200
+    assert sorted(
+        permission
+        for role, permission in crud.get_role_permissions(test_db_session)
+        if role == enums.UserRole.MODERATOR
+    ) == ['CHANGE_USER_STATUS', 'READ_USERS']
+
+
+def test_concurrent_seed_is_treated_as_seeded(
+    test_db_session: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    seeded = crud.get_role_permissions(test_db_session)
+    monkeypatch.setattr(test_db_session, 'scalar', lambda *args: None)
+
+    assert not crud.seed_role_permissions(
+        test_db_session, DEFAULT_ROLE_PERMISSIONS
+    )
+    assert sorted(crud.get_role_permissions(test_db_session)) == sorted(seeded)
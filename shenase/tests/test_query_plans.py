@@ -0,0 +1,72 @@
+from typing import Any, Callable, ContextManager
+
+import pytest
+from sqlalchemy.orm import Session
+
+from shenase import models, crud
+
+QueryCapture = Callable[[], ContextManager[list[tuple[str, Any]]]]
+
+
+def _assert_no_full_scans(
+    db: Session,
+    queries: list[tuple[str, Any]],
+) -> None:
+    connection = db.connection()
+    if connection.dialect.name != 'sqlite':
+        pytest.skip('Query plan checks only support SQLite.')
+
+    assert queries
+    for statement, parameters in queries:
+        plan = connection.exec_driver_sql(
+            f'EXPLAIN QUERY PLAN {statement}', parameters
+        ).all()
+        for row in plan:
+            detail = row[-1]
+            assert not (detail.startswith('SCAN') and 'INDEX' not in detail), (
+                f'Full table scan in `{statement}`: {detail}'
+            )
+            assert 'AUTOMATIC' not in detail, (
+                f'Temporary index in `{statement}`: {detail}'
+            )
+
+
+@pytest.mark.parametrize(
+    'lookup',
+    [
+        lambda db, user: crud.get_user_by_id(db, user.id),
+        lambda db, user: crud.get_user_by_username(db, user.username),
+        lambda db, user: crud.get_user_by_email(db, user.email),
+        lambda db, user: crud.get_profile_by_user_id(db, user.id),
+        lambda db, user: crud.get_profile_by_username(db, user.username),
+        lambda db, user: crud.get_profile_version_by_username(
+            db, user.username
+        ),
+        lambda db, user: crud.get_profile_versions(db, 10, user.id),
+        lambda db, user: crud.validate_session(
+            db, 'unknown-token', 'fingerprint'
+        ),
+        lambda db, user: db.get(models.User, user.id).sessions,
+    ],
+    ids=[
+        'get_user_by_id',
+        'get_user_by_username',
+        'get_user_by_email',
+        'get_profile_by_user_id',
+        'get_profile_by_username',
+        'get_profile_version_by_username',
+        'get_profile_versions',
+        'validate_session',
+        'user_sessions',
+    ],
+)
+def test_hot_queries_use_indexes(
+    test_db_session: Session,
+    create_test_user: models.User,
+    capture_queries: QueryCapture,
+    lookup: Callable[[Session, models.User], Any],
+) -> None:
+    test_db_session.expire_all()
+    with capture_queries() as queries:
+        lookup(test_db_session, create_test_user)
+    _assert_no_full_scans(test_db_session, queries)
@@ -0,0 +1,71 @@
+import logging
+import re
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from shenase import querystats
+from shenase.middlewares import QueryStatsMiddleware
+from shenase.tests.conftest import engine
+
+querystats.instrument_engine(engine)
+
+
+@pytest.mark.parametrize('server_timing', [True, False])
+def test_server_timing_header(server_timing: bool) -> None:
+    app = FastAPI()
+
+    @app.get('/')
+    def read_root() -> int:
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+        return 1
+
+    app.add_middleware(QueryStatsMiddleware, server_timing=server_timing)
+    response = TestClient(app).get('/')
+    if not server_timing:
+        assert 'server-timing' not in response.headers
+        return
+    match = re.fullmatch(
+        r'db;dur=[\d.]+;desc="(\d+) queries", app;dur=[\d.]+',
+        response.headers['server-timing'],
+    )
+    assert match is not None
+    assert int(match.group(1)) >= 1
+
+
+def test_slow_query_log(
+    monkeypatch: pytest.MonkeyPatch,
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    monkeypatch.setattr(querystats, 'SLOW_QUERY_THRESHOLD_MS', 1e-6)
+    with caplog.at_level(logging.WARNING, logger='shenase.querystats'):
+        with engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+    assert 'Slow query' in caplog.text
+    assert 'SELECT 1' in caplog.text
+
+
+def test_repeated_statements_are_flagged(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    app = FastAPI()
+
+    @app.get('/')
+    def read_root() -> int:
+        with engine.connect() as connection:
+            for user_id in range(3):
+                connection.execute(
+                    text('SELECT id FROM users WHERE id = :id'),
+                    {'id': user_id},
+                )
+            connection.execute(text('SELECT 1'))
+        return 1
+
+    app.add_middleware(QueryStatsMiddleware, repeat_threshold=3)
+    with caplog.at_level(logging.WARNING, logger='shenase.middlewares'):
+        TestClient(app).get('/')
+    assert 'Statement ran 3 times in GET /' in caplog.text
+    assert 'SELECT 1' not in caplog.text
@@ -0,0 +1,66 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from shenase import models
+from shenase.ratelimit import MemoryRateLimitBackend, login_rate_limiter
+
+
+@pytest.mark.anyio
+async def test_memory_token_bucket() -> None:
+    now = [0.0]
+    backend = MemoryRateLimitBackend(clock=lambda: now[0])
+
+    assert await backend.acquire('key', capacity=2, rate=0.5) == 0
+    assert await backend.acquire('key', capacity=2, rate=0.5) == 0
+    assert await backend.acquire('key', capacity=2, rate=0.5) == 2
+    assert await backend.acquire('other', capacity=2, rate=0.5) == 0
+
+    now[0] = 2.0
+    assert await backend.acquire('key', capacity=2, rate=0.5) == 0
+    assert await backend.acquire('key', capacity=2, rate=0.5) > 0
+
+
+@pytest.mark.anyio
+async def test_memory_backend_keeps_active_buckets_when_full() -> None:
+    now = [0.0]
+    backend = MemoryRateLimitBackend(max_keys=2, clock=lambda: now[0])
+
+    assert await backend.acquire('username:victim', 1, 0.1) == 0
+    assert await backend.acquire('username:victim', 1, 0.1) == 10
+    assert await backend.acquire('username:spray0', 1, 0.1) == 0
+    for i in range(1, 5):
+        assert await backend.acquire(f'username:spray{i}', 1, 0.1) == 0
+    assert await backend.acquire('username:legit', 1, 0.1) == 0
+    assert await backend.acquire('username:victim', 1, 0.1) == 10
+
+    assert await backend.acquire('client:1.2.3.4', 1, 0.1) == 0
+    assert await backend.acquire('client:1.2.3.4', 1, 0.1) == 10
+
+    now[0] = 10.0
+    assert await backend.acquire('username:spray5', 1, 0.1) == 0
+    assert await backend.acquire('username:spray5', 1, 0.1) == 10
+
+
+def test_login_is_throttled_before_any_lookup(
+    test_client: TestClient,
+    create_test_user: models.User,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setitem(login_rate_limiter.limits, 'username', (2, 1 / 60))
+    for _ in range(2):
+        response = test_client.post(
+            '/login/', json={'username': 'johndoe', 'password': 'wrong'}
+        )
+        assert response.status_code == 401
+
+    with patch(
+        'shenase.async_crud.get_user_by_username', new_callable=AsyncMock
+    ) as mock_get_user:
+        response = test_client.post(
+            '/login/', json={'username': 'JohnDoe', 'password': 'wrong'}
+        )
+    assert response.status_code == 429
+    assert 0 < int(response.headers['retry-after']) <= 60
+    mock_get_user.assert_not_called()
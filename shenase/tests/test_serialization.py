@@ -0,0 +1,143 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from shenase import crud, models, schemas
+from shenase.middlewares import (
+    CompressionMiddleware,
+    brotli,
+    get_accepted_encodings,
+)
+from shenase.routers import users
+from shenase.serialization import ResponseSerializer
+
+
+def _create_users(db: Session, count: int) -> None:
+    crud.import_users(
+        db,
+        [
+            {
+                'username': f'user{i}',
+                'email': f'user{i}@example.com',
+                'hashed_password': 'not-a-real-hash',
+                'display_name': f'User Number {i}',
+                'bio': 'Bio ' * 20,
+                'location': None,
+            }
+            for i in range(count)
+        ],
+    )
+
+
+def test_serializer_matches_validated_output(
+    create_test_user: models.User,
+) -> None:
+    user_without_profile = models.User(
+        id=2,
+        username='janedoe',
+        email='janedoe@example.com',
+        role=create_test_user.role,
+        is_verified=False,
+        status=create_test_user.status,
+        created_at=create_test_user.created_at,
+    )
+    page = {
+        'items': [create_test_user, user_without_profile],
+        'next_cursor': 'abc',
+    }
+    adapter = TypeAdapter(schemas.Page[schemas.User])
+    serializer = ResponseSerializer(schemas.Page[schemas.User])
+
+    expected = adapter.dump_json(
+        adapter.validate_python(page, from_attributes=True)
+    )
+    assert serializer.dump_json(page) == expected
+
+
+def test_fast_json_responses(
+    test_client: TestClient,
+    test_db_session: Session,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    _create_users(test_db_session, 3)
+    expected = test_client.get('/profiles/').json()
+
+    monkeypatch.setattr(users, 'FAST_JSON_RESPONSES_ENABLED', True)
+    response = test_client.get('/profiles/')
+    assert response.headers['content-type'] == 'application/json'
+    assert response.json() == expected
+    assert expected['items'][0]['avatar_urls']
+
+
+def test_get_accepted_encodings() -> None:
+    assert get_accepted_encodings('gzip, br;q=0, deflate;q=0.5') == {
+        'gzip',
+        'deflate',
+    }
+    assert get_accepted_encodings('') == set()
+
+
+def test_response_compression(
+    test_client: TestClient,
+    test_db_session: Session,
+) -> None:
+    _create_users(test_db_session, 30)
+
+    response = test_client.get(
+        '/profiles/', headers={'Accept-Encoding': 'gzip'}
+    )
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'accept-encoding' in response.headers['vary'].lower()
+    assert len(response.json()['items']) == 30
+
+    response = test_client.get(
+        '/profiles/', params={'limit': 1}, headers={'Accept-Encoding': 'gzip'}
+    )
+    assert 'content-encoding' not in response.headers
+
+    response = test_client.get(
+        '/profiles/', headers={'Accept-Encoding': 'identity'}
+    )
+    assert 'content-encoding' not in response.headers
+
+
+def test_response_compression_streams_chunks() -> None:
+    chunks = [b'x' * 600 for _ in range(5)]
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=1024)
+
+    @app.get('/stream/')
+    def stream() -> StreamingResponse:
+        return StreamingResponse(iter(chunks), media_type='text/plain')
+
+    @app.get('/image/')
+    def image() -> StreamingResponse:
+        return StreamingResponse(iter(chunks), media_type='image/png')
+
+    client = TestClient(app)
+    response = client.get('/stream/', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert 'content-length' not in response.headers
+    assert response.content == b''.join(chunks)
+
+    response = client.get('/image/', headers={'Accept-Encoding': 'gzip'})
+    assert 'content-encoding' not in response.headers
+    assert response.content == b''.join(chunks)
+
+
+@pytest.mark.skipif(brotli is None, reason='brotli is not installed')
+def test_response_compression_prefers_brotli(
+    test_client: TestClient,
+    test_db_session: Session,
+) -> None:
+    _create_users(test_db_session, 30)
+
+    response = test_client.get(
+        '/profiles/',
+        headers={'Accept-Encoding': 'gzip, br'},
+    )
+    assert response.headers['content-encoding'] == 'br'
+    assert len(response.json()['items']) == 30
@@ -0,0 +1,162 @@
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from shenase import models, enums, tokens
+from shenase.revocation import RevocationList, revocation_list
+from shenase.routers import auth
+
+
+def _make_session(expires_in: timedelta) -> models.Session:
+    return models.Session(
+        id=1,
+        user_id=1,
+        client_fingerprint='f' * 64,
+        expires_at=datetime.now(timezone.utc) + expires_in,
+    )
+
+
+def _make_user() -> models.User:
+    return models.User(
+        id=1,
+        username='johndoe',
+        email='johndoe@example.com',
+        role=enums.UserRole.USER,
+        is_verified=False,
+        status=enums.UserStatus.ACTIVE,
+        created_at=datetime.now(timezone.utc),
+    )
+
+
+def test_access_token_roundtrip() -> None:
+    access_token = tokens.create_access_token(
+        _make_session(timedelta(hours=1)), _make_user()
+    )
+
+    claims = tokens.decode_access_token(access_token, 'f' * 64)
+    assert claims['sid'] == 1
+    assert claims['uid'] == 1
+    assert claims['role'] == enums.UserRole.USER.value
+    assert tokens.decode_access_token(access_token, 'e' * 64) is None
+    tampered_token = access_token[:-1] + (
+        '1' if access_token.endswith('0') else '0'
+    )
+    assert tokens.decode_access_token(tampered_token) is None
+
+    user = tokens.get_token_user(claims)
+    assert (user.id, user.username, user.role, user.status) == (
+        1,
+        'johndoe',
+        enums.UserRole.USER,
+        enums.UserStatus.ACTIVE,
+    )
+
+
+def test_expired_access_token_is_rejected() -> None:
+    access_token = tokens.create_access_token(
+        _make_session(timedelta(seconds=-1)), _make_user()
+    )
+    assert tokens.decode_access_token(access_token) is None
+
+
+def test_revocation_list() -> None:
+    revocations = RevocationList(max_token_age=timedelta(days=1))
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    claims = {'sid': 1, 'uid': 1, 'iat': time.time() - 10}
+
+    assert not revocations.is_revoked(claims)
+    revocations.update(
+        sessions=[],
+        users=[(1, now)],
+        watermark=now,
+    )
+    assert revocations.is_revoked(claims)
+    assert not revocations.is_revoked({**claims, 'iat': time.time() + 1})
+
+    revocations.revoke_session(2, now + timedelta(hours=1))
+    revocations.revoke_session(3, now - timedelta(hours=1))
+    revocations.update(sessions=[], users=[], watermark=now)
+    assert revocations.stats() == {'sessions': 1, 'users': 1}
+
+
+@pytest.fixture(scope='function')
+def signed_tokens(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(auth, 'ACCESS_TOKEN_MODE', 'signed')
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    revocation_list.update(sessions=[], users=[], watermark=now)
+
+
+def test_signed_token_session(
+    test_client: TestClient,
+    create_test_user: models.User,
+    mock_middlewares_get_db: Mock,
+    signed_tokens: None,
+) -> None:
+    login_response = test_client.post(
+        '/login/', json={'username': 'johndoe', 'password': 'password123'}
+    )
+    access_token = login_response.cookies.get('access_token')
+    assert tokens.is_signed_token(access_token)
+    test_client.cookies.set('access_token', access_token)
+
+    response = test_client.get('/users/me/')
+    assert response.status_code == 200
+    assert response.json()['profile']['display_name'] == 'John Doe'
+    mock_middlewares_get_db.assert_not_called()
+
+    test_client.post('/logout/')
+    test_client.cookies.set('access_token', access_token)
+    assert test_client.get('/users/me/').status_code == 404
+
+
+def test_status_change_revokes_signed_tokens(
+    test_client: TestClient,
+    create_test_user: models.User,
+    create_test_admin_user: models.User,
+    mock_middlewares_get_db: Mock,
+    signed_tokens: None,
+) -> None:
+    login_response = test_client.post(
+        '/login/', json={'username': 'johndoe', 'password': 'password123'}
+    )
+    access_token = login_response.cookies.get('access_token')
+    test_client.cookies.set('access_token', access_token)
+    assert test_client.get('/users/me/').status_code == 200
+
+    login_response = test_client.post(
+        '/login/', json={'username': 'adminuser', 'password': 'testpass123'}
+    )
+    test_client.cookies.set(
+        'access_token', login_response.cookies.get('access_token')
+    )
+    response = test_client.patch(
+        '/users/johndoe/status/',
+        params={'new_status': enums.UserStatus.INACTIVE.value},
+    )
+    assert response.status_code == 200
+
+    test_client.cookies.set('access_token', access_token)
+    assert test_client.get('/users/me/').status_code == 404
+
+
+def test_stale_revocation_list_fails_closed(
+    test_client: TestClient,
+    create_test_user: models.User,
+    mock_middlewares_get_db: Mock,
+    signed_tokens: None,
+) -> None:
+    login_response = test_client.post(
+        '/login/', json={'username': 'johndoe', 'password': 'password123'}
+    )
+    test_client.cookies.set(
+        'access_token', login_response.cookies.get('access_token')
+    )
+    revocation_list.clear()
+
+    response = test_client.get('/users/me/')
+    assert response.status_code == 401
+    assert 'set-cookie' not in response.headers
+    mock_middlewares_get_db.assert_not_called()
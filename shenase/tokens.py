@@ -0,0 +1,116 @@
+import asyncio
+import base64
+import binascii
+import hmac
+import json
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from shenase import models, schemas, async_crud, enums, utils
+from shenase.database import session_scope
+from shenase.revocation import revocation_list
+from shenase.config import (
+    SESSION_EXPIRE_DAYS,
+    REVOCATION_REFRESH_INTERVAL_SECONDS,
+)
+
+FINGERPRINT_LENGTH = 32
+CLOCK_SKEW = timedelta(seconds=60)
+
+logger = logging.getLogger(__name__)
+
+
+def create_access_token(
+    session: models.Session,
+    user: models.User | schemas.User,
+) -> str:
+    claims = {
+        'sid': session.id,
+        'uid': user.id,
+        'role': user.role.value,
+        'usr': {
+            'name': user.username,
+            'email': user.email,
+            'verified': user.is_verified,
+            'status': user.status.value,
+            'created': user.created_at.replace(
+                tzinfo=timezone.utc
+            ).timestamp(),
+        },
+        'fp': session.client_fingerprint[:FINGERPRINT_LENGTH],
+        'iat': time.time(),
+        'exp': int(
+            session.expires_at.replace(tzinfo=timezone.utc).timestamp()
+        ),
+    }
+    payload = json.dumps(claims, separators=(',', ':')).encode('utf-8')
+    encoded = base64.urlsafe_b64encode(payload).decode('utf-8').rstrip('=')
+    return f'{encoded}.{utils.sign(encoded)}'
+
+
+def is_signed_token(access_token: str) -> bool:
+    return '.' in access_token
+
+
+def decode_access_token(
+    access_token: str,
+    client_fingerprint: Optional[str] = None,
+) -> Optional[dict[str, Any]]:
+    encoded, _, signature = access_token.partition('.')
+    if not utils.verify_signature(encoded, signature):
+        return None
+    try:
+        claims = json.loads(
+            base64.urlsafe_b64decode(encoded + '=' * (-len(encoded) % 4))
+        )
+    except (binascii.Error, ValueError):
+        return None
+    if claims['exp'] <= time.time():
+        return None
+    elif client_fingerprint is not None and not hmac.compare_digest(
+        claims['fp'], client_fingerprint[:FINGERPRINT_LENGTH]
+    ):
+        return None
+    return claims
+
+
+def get_token_user(claims: dict[str, Any]) -> Optional[schemas.User]:
+    user = claims.get('usr')
+    if user is None:
+        return None
+    return schemas.User.model_construct(
+        id=claims['uid'],
+        username=user['name'],
+        email=user['email'],
+        role=enums.UserRole(claims['role']),
+        is_verified=user['verified'],
+        status=enums.UserStatus(user['status']),
+        created_at=datetime.fromtimestamp(user['created'], timezone.utc),
+        profile=None,
+    )
+
+
+async def refresh_revocations(db: Session | AsyncSession) -> None:
+    started_at = datetime.now(timezone.utc).replace(tzinfo=None)
+    since = revocation_list.watermark or started_at - timedelta(
+        days=SESSION_EXPIRE_DAYS
+    )
+    sessions, users = await async_crud.get_revocations(db=db, since=since)
+    revocation_list.update(sessions, users, watermark=started_at - CLOCK_SKEW)
+
+
+async def run_revocation_refresher(
+    interval: float = REVOCATION_REFRESH_INTERVAL_SECONDS,
+) -> None:
+    while True:
+        try:
+            async with session_scope() as db:
+                await refresh_revocations(db)
+        except Exception:
+            logger.exception('Revocation refresh failed.')
+        await asyncio.sleep(interval)
@@ -1,7 +1,22 @@
+import base64
+import binascii
 import hashlib
+import hmac
+import json
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from importlib.util import find_spec
+from typing import Any, Optional
 
 import bcrypt
-from fastapi import Request
+from starlette.requests import HTTPConnection
+
+from shenase import enums
+from shenase.exceptions import InvalidCursorError
+from shenase.config import SECRET_KEY, AVATAR_PUBLIC_URL, AVATAR_SIZES
+
+AVATAR_DERIVATIVE_SIZES = AVATAR_SIZES if find_spec('PIL') else ()
+AVATAR_DERIVATIVE_FORMAT = 'webp'
 
 
 def get_password_hash(password: str) -> str:
@@ -16,8 +31,86 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     )
 
 
-def generate_client_fingerprint(request: Request) -> str:
-    user_agent = request.headers.get('user-agent', 'unknown')
-    accept_language = request.headers.get('accept-language', 'unknown')
+def generate_client_fingerprint(connection: HTTPConnection) -> str:
+    user_agent = connection.headers.get('user-agent', 'unknown')
+    accept_language = connection.headers.get('accept-language', 'unknown')
     client_fingerprint = f'{user_agent}-{accept_language}'
     return hashlib.sha256(client_fingerprint.encode('utf-8')).hexdigest()
+
+
+def sign(value: str) -> str:
+    return hmac.new(
+        SECRET_KEY.encode('utf-8'), value.encode('utf-8'), hashlib.sha256
+    ).hexdigest()
+
+
+def verify_signature(value: str, signature: str) -> bool:
+    return hmac.compare_digest(sign(value), signature)
+
+
+def encode_cursor(last_id: int, order: enums.SortOrder) -> str:
+    payload = json.dumps({'id': last_id, 'order': order}).encode('utf-8')
+    return base64.urlsafe_b64encode(payload).decode('utf-8').rstrip('=')
+
+
+def decode_cursor(
+    cursor: Optional[str],
+    order: enums.SortOrder,
+) -> Optional[int]:
+    if cursor is None:
+        return None
+    try:
+        payload = json.loads(
+            base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        )
+        last_id = payload['id']
+        cursor_order = enums.SortOrder(payload['order'])
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise InvalidCursorError from e
+    if not isinstance(last_id, int) or cursor_order != order:
+        raise InvalidCursorError
+    return last_id
+
+
+def get_avatar_derivative_filename(avatar: str, size: int) -> str:
+    return f'{avatar}.{size}.{AVATAR_DERIVATIVE_FORMAT}'
+
+
+def get_avatar_urls(avatar: Optional[str]) -> dict[str, str]:
+    if avatar is None:
+        return {}
+    avatar_urls = {'original': f'{AVATAR_PUBLIC_URL}/{avatar}'}
+    for size in AVATAR_DERIVATIVE_SIZES:
+        derivative = get_avatar_derivative_filename(avatar, size)
+        avatar_urls[str(size)] = f'{AVATAR_PUBLIC_URL}/{derivative}'
+    return avatar_urls
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(repr(parts).encode('utf-8'), digest_size=16)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == '*':
+        return True
+    return any(
+        tag.strip().removeprefix('W/') == etag.removeprefix('W/')
+        for tag in if_none_match.split(',')
+    )
+
+
+def format_http_date(value: datetime) -> str:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return format_datetime(value.astimezone(timezone.utc), usegmt=True)
+
+
+def parse_http_date(value: str) -> Optional[datetime]:
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed